@@ -0,0 +1,154 @@
+# admission.py
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from config import Config
+import deadline
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS, DEGRADED_REQUESTS
+
+# Features dropped as load rises: (pressure threshold, feature), cheapest loss first.
+# Pressure is (in-flight + queued) / max in-flight when a request is admitted.
+DEGRADATION_STEPS = (
+    (Config.DEGRADE_PDF_PRESSURE, 'pdf'),
+    (Config.DEGRADE_ACTIVITIES_PRESSURE, 'activities'),
+)
+
+class Overloaded(Exception):
+    """Raised when a request is shed; carries the Retry-After hint in seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounded in-flight limit with a priority queue and queue-time deadlines
+
+    Lower priority values are admitted first; ties are served in arrival order.
+    A freed slot is handed straight to the best waiter, so queued requests are
+    never overtaken by new arrivals.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, queue_timeout=None):
+        self.max_in_flight = max_in_flight if max_in_flight is not None else Config.ADMISSION_MAX_IN_FLIGHT
+        self.max_queue = max_queue if max_queue is not None else Config.ADMISSION_MAX_QUEUE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else Config.ADMISSION_QUEUE_TIMEOUT
+        self.in_flight = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._service_time = 1.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_in_flight > 0
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        ADMISSION_QUEUED.set(len(self._waiters))
+
+    def _retry_after(self):
+        """Seconds until the current queue should have drained"""
+        return max(1, math.ceil(self._service_time * (len(self._waiters) + 1) / self.max_in_flight))
+
+    def _reject(self, reason):
+        ADMISSION_REJECTED.inc(reason)
+        return Overloaded(reason, self._retry_after())
+
+    def acquire(self, priority=0):
+        """Take a slot, waiting in the queue if needed; raise Overloaded when shed"""
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._waiters:
+                self.in_flight += 1
+                self._update_gauges()
+                ADMISSION_WAIT_SECONDS.observe(0.0)
+                return self._pressure()
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject('queue_full')
+            # [priority, arrival order, granted event]; the sequence keeps events uncompared
+            waiter = [priority, next(self._sequence), threading.Event()]
+            heapq.heappush(self._waiters, waiter)
+            self._update_gauges()
+
+        # Never queue past the request's own deadline
+        left = deadline.remaining()
+        start = time.perf_counter()
+        granted = waiter[2].wait(self.queue_timeout if left is None else min(self.queue_timeout, left))
+        with self._lock:
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start)
+            if not granted and not waiter[2].is_set():
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._update_gauges()
+                raise self._reject('queue_timeout')
+            return self._pressure()
+
+    def release(self, service_time=None):
+        """Free a slot (handing it to the best waiter, if any)"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if service_time is not None:
+                # Smoothed service time for Retry-After estimates
+                self._service_time = 0.8 * self._service_time + 0.2 * service_time
+            if self._waiters:
+                heapq.heappop(self._waiters)[2].set()
+            else:
+                self.in_flight -= 1
+            self._update_gauges()
+
+    def _pressure(self):
+        return (self.in_flight + len(self._waiters)) / self.max_in_flight
+
+    @contextmanager
+    def slot(self, priority=0):
+        """Hold a slot for the duration of the block; yields the features to drop"""
+        pressure = self.acquire(priority)
+        degraded = {feature for threshold, feature in DEGRADATION_STEPS if pressure >= threshold}
+        for feature in sorted(degraded):
+            DEGRADED_REQUESTS.inc(feature)
+
+        start = time.perf_counter()
+        try:
+            yield degraded
+        finally:
+            self.release(time.perf_counter() - start)
+
+def _needs_forecast(date_string, today):
+    """Whether weather for a date comes from the forecast API (normals beyond the horizon are local)"""
+    try:
+        day = datetime.strptime(date_string, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return False
+    return (day - today).days <= Config.WEATHER_FORECAST_DAYS
+
+def estimate_upstream_calls(user_input, today=None):
+    """Upstream calls a /plan request will make, used as its admission priority
+
+    Counts what the planner actually sends: one flight search per distinct
+    leg, hotels and activities once per distinct city (repeat visits share
+    the calls), and one batched forecast call only if some stop starts
+    within the forecast horizon. Cheaper requests are admitted first.
+    """
+    today = today or date.today()
+    legs = user_input.get('legs')
+    if not legs:
+        forecast = _needs_forecast(user_input.get('departure_date'), today)
+        return 3 + forecast
+
+    home = str(legs[0].get('origin', '')).lower()
+    searches = {(str(leg.get('origin', '')).lower(), str(leg.get('destination', '')).lower(), leg.get('departure_date'))
+                for leg in legs}
+    # The last leg back to the starting city is a flight, not a stay
+    stays = legs[:-1] if str(legs[-1].get('destination', '')).lower() == home else legs
+    cities = {str(leg.get('destination', '')).lower() for leg in stays}
+    forecast = any(_needs_forecast(leg.get('departure_date'), today) for leg in stays)
+    return len(searches) + 2 * len(cities) + forecast
@@ -1,22 +1,146 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g
+from werkzeug.security import safe_join
 from flask_cors import CORS
 from trip_planner import TripPlanner
-from pdf_generator import generate_pdf
+from pdf_generator import generate_pdf, preload as preload_pdf
+from plan_store import PlanStore, parse_fields
+from admission import AdmissionController, Overloaded, estimate_upstream_calls
+from currency import RATES, convert_plan, normalize_currency
+from models import ValidationError, parse_plan_request, to_dict
+import deadline
+import profiling
+from response_encoding import encode_response, negotiate_format
+from http_cache import variant_etag, file_etag, parse_timestamp, is_not_modified, matching_etag
+from metrics import REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, trace_id_var, trace_id_from_header, record_cache
+from logger import configure_logging, get_logger
 from config import Config
+import atexit
 import os
+import threading
+import time
+
+configure_logging()
+logger = get_logger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
 app.secret_key = Config.SECRET_KEY
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = Config.STATIC_CACHE_MAX_AGE
 
-# Initialize trip planner
+# Initialize trip planner (authentication happens on first use or during warm-up)
 planner = TripPlanner()
 
+# Bounds concurrent plan builds and sheds load under bursts
+admission = AdmissionController()
+
+# Warm-up state reported by /readyz
+warmup = {'state': 'pending'}
+
+def warm_up():
+    """Authenticate and load the PDF stack in the background"""
+    warmup['state'] = 'running'
+    try:
+        planner.amadeus.warm_up()
+        preload_pdf()
+    except Exception as e:
+        logger.error("Warm-up failed: %s", e)
+    warmup['state'] = 'done'
+
 # Ensure directories exist
 Config.ensure_directories()
 
+# Initialize plan store (pending writes are flushed on shutdown)
+plan_store = PlanStore()
+atexit.register(plan_store.close)
+
+if Config.WARMUP_ON_START:
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+@app.before_request
+def start_trace():
+    """Assign a trace ID and start timing the request"""
+    g.trace_id = trace_id_from_header(request.headers.get('X-Request-ID'))
+    g.trace_token = trace_id_var.set(g.trace_id)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def finish_trace(response):
+    """Record request metrics and echo the trace ID"""
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if 'request_start' in g:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint)
+    HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    if 'trace_id' in g:
+        response.headers['X-Request-ID'] = g.trace_id
+    return response
+
+@app.teardown_request
+def end_trace(exc=None):
+    """Clear the trace ID"""
+    if 'trace_token' in g:
+        trace_id_var.reset(g.trace_token)
+
+def overloaded_response(error):
+    """Fast 503 for shed requests"""
+    response = jsonify({'success': False, 'error': 'Server is busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def route_label(plan_request):
+    """Short description of a trip, e.g. 'BER -> CDG -> FCO'"""
+    if plan_request.legs:
+        return ' -> '.join([plan_request.legs[0].origin] + [leg.destination for leg in plan_request.legs])
+    return f"{plan_request.origin} -> {plan_request.destination}"
+
+def pdf_name(plan_id):
+    """PDF file name for a stored plan (in the base currency)"""
+    return f"trip_plan_{plan_id}.pdf"
+
+@app.route('/healthz')
+def liveness():
+    """Liveness probe"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readiness():
+    """Readiness probe; not ready until warm-up has finished"""
+    ready = warmup['state'] == 'done' or not Config.WARMUP_ON_START
+    return jsonify({
+        'ready': ready,
+        'warmup': warmup['state'],
+        'authenticated': planner.amadeus.authenticated
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics"""
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """Stored request profiles with their hottest functions (?limit=, ?sort=tottime|cumtime)"""
+    if not profiling.is_admin(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Not found'}), 404
+    limit = request.args.get('limit', type=int)
+    sort = request.args.get('sort', 'tottime')
+    profiles = [profiling.summarize(profile_id, limit, sort) for profile_id in profiling.list_profiles()]
+    return jsonify({'profiles': [profile for profile in profiles if profile is not None]})
+
+@app.route('/admin/profiles/<profile_id>')
+def get_profile(profile_id):
+    """One profile's summary, or the raw pstats file with ?format=pstats"""
+    if not profiling.is_admin(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Not found'}), 404
+    summary = profiling.summarize(profile_id, request.args.get('limit', type=int), request.args.get('sort', 'tottime'))
+    if summary is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'pstats':
+        return send_from_directory(os.path.abspath(Config.PROFILE_DIR), f"{profile_id}.prof", as_attachment=True)
+    return jsonify(summary)
+
 @app.route('/')
 def home():
     """Home page"""
@@ -26,51 +150,161 @@ def home():
 def create_plan():
     """Create trip plan"""
     try:
-        data = request.json
-        
-        # Validate
-        if not data:
-            return jsonify({'success': False, 'error': 'No data'})
-        
-        required = ['origin', 'destination', 'departure_date']
-        for field in required:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing: {field}'})
+        # Validate before queueing or calling upstream
+        try:
+            plan_request = parse_plan_request(request.get_json(silent=True))
+        except ValidationError as e:
+            return jsonify({'success': False, 'error': str(e), 'errors': e.errors}), 400
         
-        print(f"\n📋 Planning trip: {data['origin']} → {data['destination']}")
+        currency = plan_request.currency
+        data = to_dict(plan_request)
+        logger.info("Planning %strip: %s", 'multi-city ' if plan_request.legs else '', route_label(plan_request))
         
-        # Create plan
-        trip_plan = planner.create_trip_plan(data)
-        
-        # Generate PDF
-        pdf_filename = generate_pdf(trip_plan)
+        budget = deadline.budget_from_header(request.headers.get('X-Request-Timeout-Ms'))
+        profile_reason = profiling.trigger(request.headers)
+        with deadline.scope(budget), admission.slot(priority=estimate_upstream_calls(data)) as degraded, \
+                profiling.request_profile(f"POST /plan {route_label(plan_request)}", profile_reason, g.trace_id) as profile:
+            # Create plan (prices stay in the base currency in the store)
+            trip_plan = to_dict(planner.create_trip_plan(data, omit=degraded))
+            display_plan = convert_plan(trip_plan, currency) if currency else trip_plan
+            
+            # Generate PDF (deferred to /plan/<id>/pdf under load or when out of time). Best effort:
+            # the deadline only decides whether rendering starts; a started render runs to the end
+            # The PDF is named after the plan ID, so concurrent plans never share a file
+            plan_id = plan_store.new_id()
+            if deadline.remaining() < Config.PDF_MIN_BUDGET:
+                degraded.add('pdf')
+            pdf_filename = None if 'pdf' in degraded else generate_pdf(display_plan, filename=pdf_name(plan_id))
+            
+            # Store plan
+            plan_store.save(trip_plan, pdf_filename, plan_id=plan_id)
         
         # Check if using sample data
         using_sample = False
-        if trip_plan.get('flights'):
-            using_sample = trip_plan['flights'][0].get('is_sample', False)
+        flights = trip_plan.get('flights') or [f for leg in trip_plan.get('legs', []) for f in leg['flights']]
+        if flights:
+            using_sample = flights[0].get('is_sample', False)
+        
+        # Project to requested sections only
+        trip_plan = display_plan
+        fields = parse_fields(request.args.get('fields'))
+        if fields:
+            trip_plan = {f: trip_plan[f] for f in fields if f in trip_plan}
         
-        return jsonify({
+        response = encode_response({
             'success': True,
+            'plan_id': plan_id,
             'plan': trip_plan,
-            'pdf_url': f'/download/{pdf_filename}',
-            'using_sample': using_sample
+            'pdf_url': f'/download/{pdf_filename}' if pdf_filename else f'/plan/{plan_id}/pdf',
+            'using_sample': using_sample,
+            'degraded': sorted(degraded)
         })
+        if profile is not None:
+            response.headers['X-Profile-Id'] = profile.name
+        return response
         
+    except Overloaded as e:
+        logger.warning("Shedding plan request: %s", e.reason)
+        return overloaded_response(e)
     except Exception as e:
-        print(f" Error: {e}")
+        logger.exception("Error creating plan: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/plan/<plan_id>', methods=['GET'])
+def get_plan(plan_id):
+    """Get stored trip plan"""
+    fields = parse_fields(request.args.get('fields'))
+    currency = normalize_currency(request.args.get('currency'))
+    if currency and not RATES.supports(currency):
+        return jsonify({'success': False, 'error': f'Unsupported currency: {currency}'}), 400
+    
+    meta = plan_store.get_meta(plan_id)
+    if meta is None:
+        return jsonify({'success': False, 'error': 'Plan not found'}), 404
+    
+    # Validate before loading the plan
+    content_hash, created_at = meta
+    etag = variant_etag(content_hash, ','.join(sorted(fields or [])), negotiate_format(),
+                        *((currency, RATES.version) if currency else ()))
+    last_modified = parse_timestamp(created_at)
+    
+    not_modified = is_not_modified(etag, last_modified)
+    record_cache('http_revalidation', not_modified)
+    if not_modified:
+        # Same validators and caching headers as the 200, including the coded ETag the client holds
+        response = app.response_class(status=304)
+        response.set_etag(matching_etag(etag) or etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = Config.PLAN_CACHE_MAX_AGE
+        response.vary.add('Accept')
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    trip_plan = plan_store.get(plan_id, fields)
+    if currency:
+        trip_plan = convert_plan(trip_plan, currency)
+    
+    return encode_response({
+        'success': True,
+        'plan_id': plan_id,
+        'plan': trip_plan
+    }, etag=etag, last_modified=last_modified, max_age=Config.PLAN_CACHE_MAX_AGE)
+
+@app.route('/plan/<plan_id>/pdf')
+def get_plan_pdf(plan_id):
+    """Download the PDF for a stored plan, regenerating it if missing
+
+    With ?currency= the PDF is rendered once per currency and rate table.
+    """
+    currency = normalize_currency(request.args.get('currency'))
+    if currency and not RATES.supports(currency):
+        return jsonify({'error': f'Unsupported currency: {currency}'}), 400
+
+    if currency:
+        pdf_filename = f"trip_plan_{plan_id}_{RATES.version}_{currency}.pdf"
+    else:
+        pdf_filename = plan_store.get_pdf_filename(plan_id)
+
+    if not pdf_filename or not os.path.exists(os.path.join(Config.PDF_OUTPUT_DIR, pdf_filename)):
+        trip_plan = plan_store.get(plan_id)
+        if trip_plan is None:
+            return jsonify({'error': 'Plan not found'}), 404
+
+        # Rendering from a stored plan needs no upstream calls, so it is admitted first
+        try:
+            with admission.slot(priority=0):
+                if currency:
+                    generate_pdf(convert_plan(trip_plan, currency), filename=pdf_filename)
+                else:
+                    pdf_filename = generate_pdf(trip_plan, filename=pdf_name(plan_id))
+        except Overloaded as e:
+            return overloaded_response(e)
+        if not currency:
+            plan_store.set_pdf_filename(plan_id, pdf_filename)
+    
+    return download_pdf(pdf_filename)
+
 @app.route('/download/<filename>')
 def download_pdf(filename):
-    """Download PDF"""
+    """Download PDF (supports ETag/If-Modified-Since revalidation and ranges)"""
     try:
-        return send_from_directory(
+        filepath = safe_join(Config.PDF_OUTPUT_DIR, filename)
+        if filepath is None or not os.path.isfile(filepath):
+            return jsonify({'error': 'File not found'}), 404
+        
+        response = send_from_directory(
             Config.PDF_OUTPUT_DIR,
             filename,
             as_attachment=True,
-            download_name=f"trip_plan_{filename.split('_')[-1]}"
+            download_name=f"trip_plan_{filename.split('_')[-1]}",
+            etag=file_etag(filepath),
+            conditional=True,
+            max_age=Config.PDF_CACHE_MAX_AGE
         )
+        # Trip PDFs are per-user; keep them out of shared caches
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
     except:
         return jsonify({'error': 'File not found'}), 404
 
@@ -78,11 +312,9 @@ def download_pdf(filename):
 
 
 if __name__ == '__main__':
-    print("\n" + "="*50)
-    print("🚀 Trip Planner Assistant")
-    print("="*50)
-    print(f"🔑 Amadeus API: {'Configured' if Config.validate() else 'Not configured (using sample data)'}")
-    print("🌐 Web Interface: http://127.0.0.1:5000")
-    print("="*50 + "\n")
+    logger.info("Trip Planner Assistant starting", extra={'fields': {
+        'amadeus_api': 'configured' if Config.validate() else 'not configured (using sample data)',
+        'url': 'http://127.0.0.1:5000'
+    }})
     
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='127.0.0.1', port=5000)
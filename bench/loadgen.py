@@ -0,0 +1,167 @@
+# bench/loadgen.py
+"""Drive POST /plan at a target request rate and report latency percentiles.
+
+By default the app and the stub upstreams are started in-process:
+
+    python bench/loadgen.py --rps 20 --duration 30 --latency-ms 80
+
+Use --url to load-test an already running server instead.
+
+Peak RSS is that of this process: app + stubs + load generator when run
+in-process (inprocess_peak_rss_mb), the load generator alone with --url
+(client_peak_rss_mb); watch a remote server's memory on that host.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from stub_server import start_stub_server, stub_environment
+from results import report
+
+DESTINATIONS = ['Paris', 'Rome', 'London', 'Madrid', 'Vienna', 'Amsterdam', 'Athens', 'Zurich']
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def start_local_app(args):
+    """Start stub upstreams and the app in this process; return the app URL"""
+    stub = start_stub_server(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, flight_offers=args.flight_offers, seed=args.seed
+    )
+    os.environ.update(stub_environment(stub))
+    workdir = tempfile.mkdtemp(prefix='tripplanner-bench-')
+    os.environ.setdefault('PLAN_DB_PATH', os.path.join(workdir, 'plans.db'))
+    os.environ.setdefault('PDF_OUTPUT_DIR', os.path.join(workdir, 'pdfs'))
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    # Import only after the environment points at the stub
+    from werkzeug.serving import make_server
+    import app as app_module
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def make_payload(i):
+    """Build the i-th request body"""
+    return json.dumps({
+        'origin': 'Berlin',
+        'destination': DESTINATIONS[i % len(DESTINATIONS)],
+        'departure_date': time.strftime('%Y-%m-%d', time.localtime(time.time() + 7 * 86400)),
+        'return_date': time.strftime('%Y-%m-%d', time.localtime(time.time() + 11 * 86400)),
+        'interests': ['culture', 'food']
+    }).encode('utf-8')
+
+def send(url, body, scheduled, timeout):
+    """Send one request; latency is measured from its scheduled start"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 'error'
+    return status, time.perf_counter() - scheduled
+
+def run(url, rps, duration, concurrency, timeout):
+    """Open-loop load: requests are issued on schedule regardless of completions"""
+    total = int(rps * duration)
+    interval = 1.0 / rps
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, url, make_payload(i), scheduled, timeout))
+        results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+def summarize(results, elapsed, rss_label):
+    """Latency percentiles, throughput, error counts and this process's peak RSS"""
+    ok = sorted(latency for status, latency in results if status == 200)
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        'errors': len(results) - len(ok),
+        'throughput_rps': len(ok) / elapsed if elapsed else 0.0,
+        'latency_p50_ms': percentile(ok, 50) * 1000,
+        'latency_p95_ms': percentile(ok, 95) * 1000,
+        'latency_p99_ms': percentile(ok, 99) * 1000,
+        'latency_max_ms': (ok[-1] if ok else 0.0) * 1000,
+        'latency_mean_ms': (sum(ok) / len(ok) if ok else 0.0) * 1000,
+        f'{rss_label}_peak_rss_mb': peak_rss_mb(),
+        'statuses': statuses,
+        'requests': {'total': len(results)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test POST /plan')
+    parser.add_argument('--url', help='Base URL of a running server (default: start app + stub in-process)')
+    parser.add_argument('--rps', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load')
+    parser.add_argument('--concurrency', type=int, default=64, help='Max requests in flight')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--warmup', type=int, default=3, help='Requests sent before measuring')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Stub upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=25, help='Stub upstream latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Stub upstream error rate')
+    parser.add_argument('--flight-offers', type=int, default=None, help='Stub flight offers per response')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--compare', default='latest', help="Baseline result file, 'latest' or 'none'")
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression')
+    args = parser.parse_args()
+
+    base_url = args.url or start_local_app(args)
+    plan_url = base_url.rstrip('/') + '/plan'
+
+    for i in range(args.warmup):
+        send(plan_url, make_payload(i), time.perf_counter(), args.timeout)
+
+    print(f"Driving {plan_url} at {args.rps} rps for {args.duration}s ...")
+    results, elapsed = run(plan_url, args.rps, args.duration, args.concurrency, args.timeout)
+    metrics = summarize(results, elapsed, 'client' if args.url else 'inprocess')
+
+    for name, value in metrics.items():
+        print(f"  {name:20s} {value:.2f}" if isinstance(value, float) else f"  {name:20s} {value}")
+
+    params = {k: v for k, v in vars(args).items() if k not in ('compare', 'threshold')}
+    compare_to = None if args.compare == 'none' else args.compare
+    sys.exit(report('loadgen', metrics, params, compare_to, args.threshold))
+
+if __name__ == '__main__':
+    main()
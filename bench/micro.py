@@ -0,0 +1,195 @@
+# bench/micro.py
+"""Micro-benchmarks for the planner's hot paths, using recorded payloads.
+
+    python bench/micro.py --offers 250 --days 16
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Never authenticate against a real upstream from a benchmark
+os.environ['AMADEUS_API_KEY'] = ''
+os.environ['AMADEUS_API_SECRET'] = ''
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('PDF_OUTPUT_DIR', tempfile.mkdtemp(prefix='tripplanner-micro-'))
+
+from stub_server import StubState
+from results import report
+from trip_planner import TripPlanner
+from pdf_generator import generate_pdf
+from json_stream import parse_object_stream
+from rules import RULES, RuleEngine
+from climatology import CLIMATE
+from itinerary import build_itinerary
+from models import Activity, TripInfo, TripPlan, dumps, parse_plan_request, to_dict
+from config import Config
+
+def measure(func, number, repeat):
+    """Per-call timings (ms) over several repeats"""
+    runs = timeit.repeat(func, number=number, repeat=repeat)
+    per_call = [run / number * 1000 for run in runs]
+    return min(per_call), statistics.median(per_call)
+
+def peak_memory_kb(func):
+    """Peak traced allocation (KB) of one call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def retained_kb(func):
+    """Traced memory (KB) still held by the object one call returns"""
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[0] / 1024
+    finally:
+        tracemalloc.stop()
+
+def iter_chunks(body, size):
+    """Split a response body the way requests' iter_content would"""
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def synthetic_rules(count):
+    """Rule set of the given size spread over the rule dimensions"""
+    interests = ['beach', 'hiking', 'culture', 'food', 'shopping', 'nightlife', 'nature', 'art']
+    seasons = ['winter', 'spring', 'summer', 'autumn']
+    return [{
+        'kind': 'attraction' if i % 2 else 'packing',
+        'priority': i % 50,
+        'when': {
+            'interests': [interests[i % len(interests)]],
+            'destinations': [f'city{i % 400}'],
+            'seasons': [seasons[i % len(seasons)]] if i % 3 else []
+        },
+        'items': [f'item {i}']
+    } for i in range(count)]
+
+def synthetic_activities(count):
+    """Activities on a deterministic spiral around central Paris"""
+    return [Activity(name=f'activity {i}', location={
+        'latitude': 48.8566 + 0.002 * i * math.cos(i * 2.4),
+        'longitude': 2.3522 + 0.003 * i * math.sin(i * 2.4)
+    }) for i in range(count)]
+
+def build_inputs(offers, days):
+    """Recorded payloads sized for the benchmark"""
+    state = StubState(flight_offers=offers)
+    start = datetime.now() + timedelta(days=7)
+    end = start + timedelta(days=days - 1)
+    query = {'start_date': [start.strftime('%Y-%m-%d')], 'end_date': [end.strftime('%Y-%m-%d')]}
+    weather = json.loads(state.weather_body(query))
+    return state, weather, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+def main():
+    parser = argparse.ArgumentParser(description='Planner micro-benchmarks')
+    parser.add_argument('--offers', type=int, default=250, help='Flight offers in the parsed payload')
+    parser.add_argument('--days', type=int, default=16, help='Days of hourly weather data')
+    parser.add_argument('--number', type=int, default=20, help='Calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per benchmark')
+    parser.add_argument('--compare', default='latest', help="Baseline result file, 'latest' or 'none'")
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression')
+    args = parser.parse_args()
+
+    metrics = {}
+    planner = TripPlanner()
+    state, weather, start_date, end_date = build_inputs(args.offers, args.days)
+
+    user_input = {
+        'origin': 'Berlin', 'destination': 'Paris',
+        'departure_date': start_date, 'return_date': end_date,
+        'travelers': 1, 'interests': ['culture', 'food']
+    }
+    hotels = planner._parse_hotels(state.hotels)
+    activities = planner._parse_activities(state.activities)
+    many_activities = synthetic_activities(40)
+    plan_model = TripPlan(
+        trip_info=TripInfo(
+            origin='Berlin', origin_code='BER', destination='Paris', destination_code='CDG',
+            departure_date=start_date, return_date=end_date, travelers=1,
+            budget='medium', interests=['culture', 'food']
+        ),
+        flights=planner._parse_flight_data(state.flights),
+        hotels=hotels,
+        activities=activities,
+        itinerary=build_itinerary(hotels, activities, start_date, end_date),
+        attractions=planner._get_attractions(user_input),
+        packing_list=planner._get_packing_list(user_input),
+        weather=planner._parse_weather_data(weather, start_date, end_date, 'Paris')
+    )
+    plan = to_dict(plan_model)
+
+    flight_body = state.bodies['/v2/shopping/flight-offers']
+    load_full = lambda: json.loads(flight_body)
+    load_stream = lambda: parse_object_stream(
+        iter_chunks(flight_body, Config.FLIGHT_STREAM_CHUNK_SIZE), 'data', limit=Config.FLIGHT_RESULTS_LIMIT)
+
+    rule_count = 5000
+    compile_start = timeit.default_timer()
+    large_engine = RuleEngine(synthetic_rules(rule_count))
+    metrics['rules_compile_5k_ms'] = (timeit.default_timer() - compile_start) * 1000
+    rule_context = {'interests': ['food', 'culture'], 'destinations': ['Paris', 'CDG', 'city7'], 'seasons': ['winter']}
+
+    benchmarks = {
+        'rules_match': (lambda: RULES.match('attraction', **rule_context), args.number * 50),
+        'rules_match_5k': (lambda: large_engine.match('attraction', **rule_context), args.number * 50),
+        'load_flights_json': (load_full, args.number),
+        'load_flights_stream': (load_stream, args.number),
+        'validate_request': (lambda: parse_plan_request(user_input), args.number * 50),
+        'serialize_plan': (lambda: dumps(to_dict(plan_model)), args.number * 5),
+        'parse_flight_data': (lambda: planner._parse_flight_data(state.flights), args.number),
+        'itinerary': (lambda: build_itinerary(hotels, activities, start_date, end_date), args.number * 10),
+        'itinerary_40': (lambda: build_itinerary(hotels, many_activities, start_date, end_date), args.number),
+        'climate_normals': (lambda: CLIMATE.daily('Paris', start_date, end_date), args.number * 50),
+        'parse_weather_data': (lambda: planner._parse_weather_data(weather, start_date, end_date, 'Paris'), args.number),
+        'generate_pdf': (lambda: generate_pdf(plan, filename='micro_bench.pdf'), max(1, args.number // 4)),
+    }
+
+    for name, (func, number) in benchmarks.items():
+        best, median = measure(func, number, args.repeat)
+        metrics[f'{name}_best_ms'] = best
+        metrics[f'{name}_median_ms'] = median
+        print(f"  {name:20s} best {best:9.3f} ms   median {median:9.3f} ms")
+
+    print(f"  {rule_count} rules compiled in {metrics['rules_compile_5k_ms']:.1f} ms")
+    metrics['load_flights_json_peak_kb'] = peak_memory_kb(load_full)
+    metrics['load_flights_stream_peak_kb'] = peak_memory_kb(load_stream)
+    print(f"  flight payload {len(flight_body) / 1024:.0f} KB: peak memory "
+          f"{metrics['load_flights_json_peak_kb']:.0f} KB (json.loads) vs "
+          f"{metrics['load_flights_stream_peak_kb']:.0f} KB (streamed)")
+    # Same flights (sharing their strings) held as slotted models vs plain dicts
+    flights = plan_model.flights
+    metrics['flights_model_kb'] = retained_kb(lambda: [copy.copy(flight) for flight in flights])
+    metrics['flights_dict_kb'] = retained_kb(lambda: to_dict(flights))
+    print(f"  {len(flights)} parsed flights hold {metrics['flights_model_kb']:.1f} KB as models vs "
+          f"{metrics['flights_dict_kb']:.1f} KB as dicts")
+
+    # Output size and render time per font mode and page compression setting
+    for font in ('builtin', 'unicode'):
+        for compress in (False, True):
+            key = f"pdf_{font}_{'compressed' if compress else 'uncompressed'}"
+            render = lambda: generate_pdf(plan, filename=f'{key}.pdf', font=font, page_compression=compress)
+            metrics[f'{key}_ms'] = measure(render, max(1, args.number // 4), args.repeat)[0]
+            metrics[f'{key}_kb'] = os.path.getsize(os.path.join(Config.PDF_OUTPUT_DIR, f'{key}.pdf')) / 1024
+            print(f"  {key:28s} {metrics[f'{key}_kb']:7.1f} KB   best {metrics[f'{key}_ms']:8.3f} ms")
+
+    params = {k: v for k, v in vars(args).items() if k not in ('compare', 'threshold')}
+    compare_to = None if args.compare == 'none' else args.compare
+    sys.exit(report('micro', metrics, params, compare_to, args.threshold))
+
+if __name__ == '__main__':
+    main()
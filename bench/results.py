@@ -0,0 +1,81 @@
+# bench/results.py
+"""Store benchmark results and compare them against earlier runs."""
+import glob
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def _git_revision():
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(RESULTS_DIR), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(kind, metrics, params=None):
+    """Write a result file and return its path"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(RESULTS_DIR, f"{kind}-{timestamp}.json")
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(RESULTS_DIR, f"{kind}-{timestamp}-{suffix}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'kind': kind,
+            'timestamp': timestamp,
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': params or {},
+            'metrics': metrics
+        }, f, indent=2)
+    return path
+
+def latest_result(kind, exclude=None):
+    """Path of the most recent result of a kind (optionally skipping one path)"""
+    paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, f"{kind}-*.json")) if p != exclude)
+    return paths[-1] if paths else None
+
+def load_results(path):
+    """Load a result file"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def compare(current, baseline, threshold=0.10):
+    """Print per-metric changes; return the names of metrics that regressed
+
+    Every metric is "lower is better" except names ending in '_rps'.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('timestamp')} ({baseline.get('git_revision') or 'unknown revision'}):")
+    for name, value in current['metrics'].items():
+        old = baseline['metrics'].get(name)
+        if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+            continue
+        change = (value - old) / old
+        worse = change < -threshold if name.endswith('_rps') else change > threshold
+        marker = '  REGRESSION' if worse else ''
+        print(f"  {name:40s} {old:12.3f} -> {value:12.3f} ({change:+.1%}){marker}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+def report(kind, metrics, params, compare_to=None, threshold=0.10):
+    """Save results, compare with a baseline and return an exit code"""
+    path = save_results(kind, metrics, params)
+    print(f"\nResults saved to {path}")
+
+    baseline_path = latest_result(kind, exclude=path) if compare_to == 'latest' else compare_to
+    if not baseline_path:
+        return 0
+    regressions = compare(load_results(path), load_results(baseline_path), threshold)
+    return 1 if regressions else 0
@@ -0,0 +1,204 @@
+# bench/stub_server.py
+"""Local stand-in for the Amadeus and Open-Meteo APIs.
+
+Replays the recorded payloads in bench/fixtures with configurable latency
+and error injection, so the planner can be benchmarked offline:
+
+    python bench/stub_server.py --port 8099 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+
+Then point the app at it:
+
+    AMADEUS_BASE_URL=http://127.0.0.1:8099 OPEN_METEO_URL=http://127.0.0.1:8099/v1/forecast \\
+    AMADEUS_API_KEY=bench AMADEUS_API_SECRET=bench python app.py
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_fixture(name):
+    """Load a recorded payload"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+class StubState:
+    """Recorded payloads and fault-injection settings shared by all handlers"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, flight_offers=None, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+        self.flights = load_fixture('flight_offers.json')
+        if flight_offers:
+            self.flights = self._scale_offers(self.flights, flight_offers)
+        self.hotels = load_fixture('hotels.json')
+        self.activities = load_fixture('activities.json')
+        self.weather = load_fixture('weather.json')
+
+        # Pre-encode static bodies once
+        self.bodies = {
+            '/v2/shopping/flight-offers': json.dumps(self.flights).encode('utf-8'),
+            '/v1/reference-data/locations/hotels/by-city': json.dumps(self.hotels).encode('utf-8'),
+            '/v1/shopping/activities': json.dumps(self.activities).encode('utf-8'),
+            '/v1/security/oauth2/token': json.dumps({
+                'type': 'amadeusOAuth2Token',
+                'access_token': 'bench-token',
+                'token_type': 'Bearer',
+                'expires_in': 1799,
+                'state': 'approved'
+            }).encode('utf-8'),
+        }
+
+    @staticmethod
+    def _scale_offers(flights, count):
+        """Repeat recorded offers to simulate large upstream payloads"""
+        scaled = copy.deepcopy(flights)
+        recorded = flights['data']
+        scaled['data'] = []
+        for i in range(count):
+            offer = copy.deepcopy(recorded[i % len(recorded)])
+            offer['id'] = str(i + 1)
+            scaled['data'].append(offer)
+        scaled['meta']['count'] = count
+        return scaled
+
+    def delay(self):
+        """Sleep for the configured latency (+ jitter)"""
+        latency = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000.0)
+
+    def should_fail(self):
+        """Decide whether to inject an error for this request"""
+        with self.lock:
+            self.requests += 1
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def weather_body(self, query):
+        """Expand the recorded 24h profile over the requested date range
+
+        Comma-separated coordinates get a list with one payload per location,
+        as Open-Meteo returns for multi-location requests.
+        """
+        start = datetime.strptime(query.get('start_date', [datetime.now().strftime('%Y-%m-%d')])[0], '%Y-%m-%d')
+        end = datetime.strptime(query.get('end_date', [start.strftime('%Y-%m-%d')])[0], '%Y-%m-%d')
+        profile = self.weather['hourly_profile']
+
+        times, temps, codes = [], [], []
+        day = start
+        while day <= end:
+            for hour in range(24):
+                times.append(f"{day.strftime('%Y-%m-%d')}T{hour:02d}:00")
+                temps.append(profile['temperature_2m'][hour])
+                codes.append(profile['weathercode'][hour])
+            day += timedelta(days=1)
+
+        payload = {k: v for k, v in self.weather.items() if k != 'hourly_profile'}
+        payload['hourly'] = {'time': times, 'temperature_2m': temps, 'weathercode': codes}
+
+        latitudes = query.get('latitude', [''])[0].split(',')
+        longitudes = query.get('longitude', [''])[0].split(',')
+        if len(latitudes) > 1:
+            payload = [dict(payload, latitude=float(lat), longitude=float(lon), location_id=i)
+                       for i, (lat, lon) in enumerate(zip(latitudes, longitudes))]
+        return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+def make_handler(state):
+    """Build a request handler bound to the given state"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (e.g. its request deadline passed)
+                self.close_connection = True
+
+        def _handle(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+
+            state.delay()
+            if state.should_fail():
+                self._send(500, b'{"errors": [{"status": 500, "title": "INJECTED ERROR"}]}')
+                return
+
+            if url.path == '/v1/forecast':
+                self._send(200, state.weather_body(parse_qs(url.query)))
+            elif url.path in state.bodies:
+                self._send(200, state.bodies[url.path])
+            else:
+                self._send(404, b'{"errors": [{"status": 404, "title": "NOT FOUND"}]}')
+
+        do_GET = _handle
+        do_POST = _handle
+
+    return StubHandler
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start the stub server in a background thread and return it"""
+    server = ThreadingHTTPServer((host, port), make_handler(StubState(**options)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def stub_environment(server):
+    """Environment variables that point the app at a running stub server"""
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    return {
+        'AMADEUS_BASE_URL': base_url,
+        'OPEN_METEO_URL': f"{base_url}/v1/forecast",
+        'AMADEUS_API_KEY': 'bench',
+        'AMADEUS_API_SECRET': 'bench',
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Amadeus/Open-Meteo stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--flight-offers', type=int, default=None,
+                        help='Number of flight offers to return (recorded offers are repeated)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StubState(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        flight_offers=args.flight_offers, seed=args.seed
+    )))
+    print(f"Stub server listening on http://{args.host}:{args.port}")
+    for key, value in stub_environment(server).items():
+        print(f"  {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
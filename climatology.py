@@ -0,0 +1,89 @@
+# climatology.py
+import calendar
+import json
+from array import array
+from datetime import datetime, timedelta
+from config import Config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class Climatology:
+    """Monthly climate normals per city, packed into one flat float array
+
+    Row i of the table holds city i's 12 months of each field back to back,
+    so a lookup is a dict hit plus index arithmetic with no per-city objects.
+    """
+
+    def __init__(self, cities, fields, aliases=None):
+        self.fields = tuple(fields)
+        self._rows = {}
+        self._values = array('f')
+        for row, (name, series) in enumerate(cities.items()):
+            if len(series) != len(self.fields) or any(len(months) != 12 for months in series):
+                raise ValueError(f"Climate normals for {name} need 12 months of {', '.join(self.fields)}")
+            self._rows[name.lower()] = row
+            for months in series:
+                self._values.extend(months)
+        for alias, name in (aliases or {}).items():
+            if name.lower() in self._rows:
+                self._rows[alias.lower()] = self._rows[name.lower()]
+
+    def _row(self, city):
+        return self._rows.get(city.lower().strip()) if isinstance(city, str) else None
+
+    def supports(self, city):
+        return self._row(city) is not None
+
+    def normals(self, city, month):
+        """{field: value} for a city and month (1-12), or None for unknown cities"""
+        row = self._row(city)
+        if row is None:
+            return None
+        base = row * len(self.fields) * 12 + month - 1
+        return {field: self._values[base + i * 12] for i, field in enumerate(self.fields)}
+
+    def daily(self, city, start_date, end_date):
+        """Open-Meteo style daily payload of normals for a date range (None if unknown)
+
+        Each day gets its month's normals; rain probability is the month's
+        share of wet days.
+        """
+        row = self._row(city)
+        if row is None:
+            return None
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        times, minimums, maximums, rain = [], [], [], []
+        day = start
+        while day <= end:
+            normals = self.normals(city, day.month)
+            times.append(day.isoformat())
+            minimums.append(round(normals['temp_min'], 1))
+            maximums.append(round(normals['temp_max'], 1))
+            rain.append(round(normals['wet_days'] / calendar.monthrange(day.year, day.month)[1], 2))
+            day += timedelta(days=1)
+
+        return {
+            '_climatology': True,
+            'daily_units': {'temperature_2m_max': '°C', 'temperature_2m_min': '°C'},
+            'daily': {
+                'time': times,
+                'temperature_2m_min': minimums,
+                'temperature_2m_max': maximums,
+                'rain_probability': rain
+            }
+        }
+
+def load_climatology(path=None):
+    """Load the climate normals file"""
+    path = path or Config.CLIMATE_NORMALS_PATH
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    climatology = Climatology(document['cities'], document['fields'], document.get('aliases'))
+    logger.debug("Climate normals loaded", extra={'fields': {'path': path, 'cities': len(document['cities'])}})
+    return climatology
+
+# Loaded once at startup
+CLIMATE = load_climatology()
@@ -14,16 +14,110 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'trip-planner-dev-key')
     
     # File paths
-    PDF_OUTPUT_DIR = 'pdfs'
+    PDF_OUTPUT_DIR = os.getenv('PDF_OUTPUT_DIR', 'pdfs')
+    PLAN_DB_PATH = os.getenv('PLAN_DB_PATH', 'plans.db')
+    
+    # Plan store settings
+    PLAN_STORE_BATCH_SIZE = int(os.getenv('PLAN_STORE_BATCH_SIZE', '20'))
+    PLAN_STORE_FLUSH_INTERVAL = float(os.getenv('PLAN_STORE_FLUSH_INTERVAL', '2.0'))
+    
+    # Response encoding settings
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+    RESPONSE_COMPRESSION_LEVEL = int(os.getenv('RESPONSE_COMPRESSION_LEVEL', '6'))
+    
+    # HTTP caching (seconds)
+    STATIC_CACHE_MAX_AGE = int(os.getenv('STATIC_CACHE_MAX_AGE', '86400'))
+    PLAN_CACHE_MAX_AGE = int(os.getenv('PLAN_CACHE_MAX_AGE', '300'))
+    PDF_CACHE_MAX_AGE = int(os.getenv('PDF_CACHE_MAX_AGE', '86400'))
+    
+    # PDF ETags kept in memory (most recently used files)
+    FILE_ETAG_CACHE_SIZE = int(os.getenv('FILE_ETAG_CACHE_SIZE', '1024'))
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.1'))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # Observability
+    TRACE_LOG_ENABLED = os.getenv('TRACE_LOG_ENABLED', 'false').lower() == 'true'
+    
+    # Upstream timeouts and startup (seconds)
+    AUTH_TIMEOUT = float(os.getenv('AUTH_TIMEOUT', '5'))
+    AUTH_RETRY_INTERVAL = float(os.getenv('AUTH_RETRY_INTERVAL', '30'))
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'
+    
+    # Flight search
+    FLIGHT_SEARCH_MAX = int(os.getenv('FLIGHT_SEARCH_MAX', '5'))
+    FLIGHT_RESULTS_LIMIT = int(os.getenv('FLIGHT_RESULTS_LIMIT', '20'))
+    FLIGHT_STREAM_CHUNK_SIZE = int(os.getenv('FLIGHT_STREAM_CHUNK_SIZE', '65536'))
+    
+    # Multi-city planning
+    MAX_TRIP_LEGS = int(os.getenv('MAX_TRIP_LEGS', '6'))
+    PLAN_MAX_WORKERS = int(os.getenv('PLAN_MAX_WORKERS', '8'))
+
+    # /plan input limits (checked before any upstream call)
+    MAX_TRAVELERS = int(os.getenv('MAX_TRAVELERS', '9'))
+    MAX_BOOKING_DAYS = int(os.getenv('MAX_BOOKING_DAYS', '361'))
+    MAX_TRIP_DAYS = int(os.getenv('MAX_TRIP_DAYS', '60'))
+    MAX_PLACE_LENGTH = int(os.getenv('MAX_PLACE_LENGTH', '80'))
+
+    # Admission control for /plan (ADMISSION_MAX_IN_FLIGHT=0 disables it)
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '16'))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '32'))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2.0'))
+    DEGRADE_PDF_PRESSURE = float(os.getenv('DEGRADE_PDF_PRESSURE', '0.75'))
+    DEGRADE_ACTIVITIES_PRESSURE = float(os.getenv('DEGRADE_ACTIVITIES_PRESSURE', '1.25'))
+    
+    # Request deadlines (seconds); clients may ask for less via X-Request-Timeout-Ms
+    PLAN_DEADLINE = float(os.getenv('PLAN_DEADLINE', '8'))
+    PLAN_DEADLINE_MAX = float(os.getenv('PLAN_DEADLINE_MAX', '30'))
+    PDF_MIN_BUDGET = float(os.getenv('PDF_MIN_BUDGET', '0.5'))
+    
+    # Currency: upstream prices are requested in BASE_CURRENCY and converted locally
+    BASE_CURRENCY = os.getenv('BASE_CURRENCY', 'EUR').upper()
+    EXCHANGE_RATES_PATH = os.getenv('EXCHANGE_RATES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'exchange_rates.json'))
+    EXCHANGE_RATES_REFRESH = float(os.getenv('EXCHANGE_RATES_REFRESH', '300'))
+    
+    # Attraction and packing rules
+    RULES_PATH = os.getenv('RULES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rules.json'))
+    ATTRACTIONS_LIMIT = int(os.getenv('ATTRACTIONS_LIMIT', '8'))
+    
+    # Day-by-day itinerary: most activities scheduled on one day
+    ITINERARY_MAX_PER_DAY = int(os.getenv('ITINERARY_MAX_PER_DAY', '4'))
+    
+    # Weather batching: coordinates per Open-Meteo call and widest merged date range (days)
+    WEATHER_BATCH_MAX_LOCATIONS = int(os.getenv('WEATHER_BATCH_MAX_LOCATIONS', '50'))
+    WEATHER_BATCH_MAX_DAYS = int(os.getenv('WEATHER_BATCH_MAX_DAYS', '16'))
+    
+    # Weather beyond the forecast horizon (days from today) comes from local monthly normals
+    WEATHER_FORECAST_DAYS = int(os.getenv('WEATHER_FORECAST_DAYS', '16'))
+    CLIMATE_NORMALS_PATH = os.getenv('CLIMATE_NORMALS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'climate_normals.json'))
+    RAINY_DAY_PROBABILITY = float(os.getenv('RAINY_DAY_PROBABILITY', '0.4'))
+    
+    # PDF rendering: 'unicode' embeds subsets of the bundled DejaVu Sans, 'builtin' uses Helvetica
+    PDF_FONT = os.getenv('PDF_FONT', 'unicode').lower()
+    PDF_FONT_DIR = os.getenv('PDF_FONT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts'))
+    PDF_PAGE_COMPRESSION = os.getenv('PDF_PAGE_COMPRESSION', 'true').lower() == 'true'
+    
+    # Admin endpoints (/admin/*) are disabled unless ADMIN_TOKEN is set
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    
+    # Profiling: /plan requests with an X-Profile header and the admin token, plus a sampled share
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+    PROFILE_TOP_FUNCTIONS = int(os.getenv('PROFILE_TOP_FUNCTIONS', '25'))
     
     # API endpoints
-    AMADEUS_BASE_URL = "https://test.api.amadeus.com"
+    AMADEUS_BASE_URL = os.getenv('AMADEUS_BASE_URL', "https://test.api.amadeus.com")
+    OPEN_METEO_URL = os.getenv('OPEN_METEO_URL', "https://api.open-meteo.com/v1/forecast")
     
     @staticmethod
     def validate():
         """Validate configuration"""
         if not Config.AMADEUS_API_KEY or not Config.AMADEUS_API_SECRET:
-            print("⚠️  Amadeus API credentials not found. Using sample data.")
             return False
         return True
     
@@ -0,0 +1,151 @@
+# currency.py
+import json
+import os
+import threading
+import time
+from config import Config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Display symbols; other currencies are shown with their ISO code
+CURRENCY_SYMBOLS = {'EUR': '€', 'USD': '$', 'GBP': '£', 'JPY': '¥', 'INR': '₹', 'KRW': '₩', 'TRY': '₺'}
+
+# Currencies shown without minor units
+ZERO_DECIMAL_CURRENCIES = {'JPY', 'KRW', 'HUF'}
+
+# Priced plan sections (top level and inside multi-city legs/stops)
+PRICED_SECTIONS = ('flights', 'activities')
+NESTED_PRICED_SECTIONS = {'legs': ('flights',), 'stops': ('activities',)}
+
+class UnsupportedCurrency(ValueError):
+    """Raised for a currency missing from the rate table"""
+
+class RateTable:
+    """Exchange rates from a local JSON file, re-read when the file changes
+
+    The file is checked at most every `refresh_interval` seconds, so a job can
+    replace it in place without restarting the app.
+    """
+
+    def __init__(self, path=None, refresh_interval=None):
+        self.path = path or Config.EXCHANGE_RATES_PATH
+        self.refresh_interval = refresh_interval if refresh_interval is not None else Config.EXCHANGE_RATES_REFRESH
+        self.base = Config.BASE_CURRENCY
+        self.as_of = None
+        self.rates = {self.base: 1.0}
+        self._mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Reload the table if it is due for a check and the file has changed"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                with open(self.path, encoding='utf-8') as f:
+                    table = json.load(f)
+                rates = {code.upper(): float(rate) for code, rate in table['rates'].items()}
+                base = table.get('base', Config.BASE_CURRENCY).upper()
+                rates[base] = 1.0
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Keep serving the last good table
+                logger.error("Could not load exchange rates from %s: %s", self.path, e)
+                return
+            self.base, self.rates, self.as_of, self._mtime = base, rates, table.get('as_of'), mtime
+            logger.info("Exchange rates loaded", extra={'fields': {'as_of': self.as_of, 'currencies': len(rates)}})
+
+    @property
+    def version(self):
+        """Identifies the rates in use (part of converted responses' ETags)"""
+        self._refresh()
+        return self.as_of or str(self._mtime)
+
+    def supports(self, currency):
+        self._refresh()
+        return currency in self.rates
+
+    def factor(self, from_currency, to_currency):
+        """Multiplier converting amounts from one currency to another"""
+        self._refresh()
+        try:
+            return self.rates[to_currency] / self.rates[from_currency]
+        except KeyError as e:
+            raise UnsupportedCurrency(f"Unsupported currency: {e.args[0]}")
+
+RATES = RateTable()
+
+def normalize_currency(value):
+    """Upper-case ISO code, or None if not given"""
+    return value.strip().upper() if isinstance(value, str) and value.strip() else None
+
+def _amount(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _format_amount(amount, currency):
+    return f"{amount:.0f}" if currency in ZERO_DECIMAL_CURRENCIES else f"{amount:.2f}"
+
+def convert_items(items, to_currency, rates=RATES):
+    """Convert the price column of a result list in one pass
+
+    One factor is looked up per source currency rather than per item; items
+    without a numeric price, or priced in a currency missing from the rate
+    table, keep their price (and currency) as is.
+    """
+    factors = {}
+    converted = []
+    for item in items:
+        amount = _amount(item.get('price'))
+        source = item.get('currency') or rates.base
+        if amount is None or source == to_currency:
+            converted.append(item)
+            continue
+        if source not in factors:
+            try:
+                factors[source] = rates.factor(source, to_currency)
+            except UnsupportedCurrency:
+                logger.warning("No exchange rate for %s; leaving prices unconverted", source)
+                factors[source] = None
+        factor = factors[source]
+        if factor is None:
+            converted.append(item)
+            continue
+        converted.append(dict(item, price=_format_amount(amount * factor, to_currency), currency=to_currency))
+    return converted
+
+def convert_plan(trip_plan, currency, rates=RATES):
+    """Copy of a (possibly projected) plan with prices shown in `currency`"""
+    if not rates.supports(currency):
+        raise UnsupportedCurrency(f"Unsupported currency: {currency}")
+
+    converted = dict(trip_plan, currency=currency)
+    for section in PRICED_SECTIONS:
+        if isinstance(converted.get(section), list):
+            converted[section] = convert_items(converted[section], currency, rates)
+    for section, inner_sections in NESTED_PRICED_SECTIONS.items():
+        if isinstance(converted.get(section), list):
+            converted[section] = [
+                dict(part, **{inner: convert_items(part.get(inner, []), currency, rates) for inner in inner_sections})
+                for part in converted[section]
+            ]
+    return converted
+
+def format_price(price, currency, symbol=True):
+    """Price with its currency symbol (e.g. '€123.45', 'CHF 99.00'), or ISO code only"""
+    amount = _amount(price)
+    if amount is None:
+        return str(price)
+    text = _format_amount(amount, currency)
+    symbol = CURRENCY_SYMBOLS.get(currency) if symbol else None
+    return f"{symbol}{text}" if symbol else f"{currency} {text}"
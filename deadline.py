@@ -0,0 +1,62 @@
+# deadline.py
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import Config
+
+# Absolute deadline (time.monotonic()) of the request being handled, if any.
+# Copied into planner worker threads along with the trace ID.
+deadline_var = ContextVar('deadline', default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's time budget has run out"""
+
+def budget_from_header(value):
+    """Request budget in seconds from an X-Request-Timeout-Ms header value"""
+    try:
+        budget = float(value) / 1000.0
+    except (TypeError, ValueError):
+        return Config.PLAN_DEADLINE
+    if not math.isfinite(budget) or budget <= 0:
+        return Config.PLAN_DEADLINE
+    return min(budget, Config.PLAN_DEADLINE_MAX)
+
+@contextmanager
+def scope(budget):
+    """Run the block with a deadline `budget` seconds from now (never later than an enclosing one)"""
+    new_deadline = time.monotonic() + budget
+    current = deadline_var.get()
+    token = deadline_var.set(new_deadline if current is None else min(current, new_deadline))
+    try:
+        yield
+    finally:
+        deadline_var.reset(token)
+
+def remaining():
+    """Seconds left in the budget (None when no deadline is set)"""
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+def expired():
+    """Whether the budget has run out"""
+    left = remaining()
+    return left is not None and left <= 0
+
+def timeout(default):
+    """Timeout for one stage: the default, capped by the remaining budget"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
+
+def within(chunks, until=None):
+    """Pass chunks through, stopping once the deadline (or `until`, a time.monotonic() value) has passed"""
+    for chunk in chunks:
+        if expired() or (until is not None and time.monotonic() >= until):
+            raise DeadlineExceeded("Request deadline exceeded while reading response")
+        yield chunk
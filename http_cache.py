@@ -0,0 +1,93 @@
+# http_cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import request
+from config import Config
+from metrics import record_cache
+
+# Content codings that can appear as an ETag suffix
+CODINGS = ('gzip', 'br')
+
+# path -> ((mtime, size), etag), least recently used first
+_file_etags = OrderedDict()
+_file_etags_lock = threading.Lock()
+
+def content_etag(data):
+    """Strong ETag value for a bytes/str body"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def variant_etag(content_hash, *variant):
+    """ETag value for one representation (projection/format) of some content"""
+    if not variant:
+        return content_hash[:32]
+    suffix = hashlib.sha256('|'.join(str(v) for v in variant).encode('utf-8')).hexdigest()[:8]
+    return f"{content_hash[:24]}-{suffix}"
+
+def coded_etag(etag, content_encoding):
+    """ETag for the representation after content coding (gzip/br)"""
+    return f"{etag}-{content_encoding}" if content_encoding else etag
+
+def file_etag(path):
+    """Content-hash ETag for a file, cached by (mtime, size) for the most recent files"""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    with _file_etags_lock:
+        cached = _file_etags.get(path)
+        if cached:
+            _file_etags.move_to_end(path)
+    record_cache('pdf_etag', bool(cached and cached[0] == key))
+    if cached and cached[0] == key:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+
+    with _file_etags_lock:
+        _file_etags[path] = (key, etag)
+        _file_etags.move_to_end(path)
+        while len(_file_etags) > Config.FILE_ETAG_CACHE_SIZE:
+            _file_etags.popitem(last=False)
+    return etag
+
+def parse_timestamp(value):
+    """Parse a local '%Y-%m-%d %H:%M:%S' timestamp (e.g. plan created_at) as UTC"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+def matching_etag(etag):
+    """The form of the ETag (plain or gzip/br coded) the client's If-None-Match holds, if any"""
+    if not request.if_none_match:
+        return None
+    for candidate in [etag] + [coded_etag(etag, coding) for coding in CODINGS]:
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+def is_not_modified(etag, last_modified=None):
+    """Check conditional request headers against a representation's validators
+
+    Any coded variant of the ETag also matches, since the client may hold
+    the gzip/br form of the same content.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+
+    if request.if_none_match:
+        return matching_etag(etag) is not None
+
+    if last_modified and request.if_modified_since:
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+
+    return False
@@ -0,0 +1,153 @@
+# itinerary.py
+import math
+from datetime import datetime, timedelta
+from config import Config
+from models import Itinerary, ItineraryDay, ItineraryStop
+from logger import get_logger
+
+# Optional accelerator (not in requirements.txt): numpy vectorizes the
+# distance matrix; the pure-Python loop below gives the same result
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+def coordinates(location):
+    """(latitude, longitude) from a location dict, or None if missing or a 0,0 placeholder"""
+    try:
+        latitude = float(location['latitude'])
+        longitude = float(location['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if (latitude == 0 and longitude == 0) or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+def distance_matrix(points):
+    """Haversine distances in km between every pair of (latitude, longitude) points"""
+    if np is not None:
+        radians = np.radians(np.asarray(points, dtype=float))
+        latitude, longitude = radians[:, :1], radians[:, 1:]
+        a = (np.sin((latitude - latitude.T) / 2) ** 2 +
+             np.cos(latitude) * np.cos(latitude.T) * np.sin((longitude - longitude.T) / 2) ** 2)
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).tolist()
+
+    radians = [(math.radians(latitude), math.radians(longitude)) for latitude, longitude in points]
+    cosines = [math.cos(latitude) for latitude, _ in radians]
+    matrix = [[0.0] * len(points) for _ in points]
+    for i, (latitude1, longitude1) in enumerate(radians):
+        for j in range(i + 1, len(radians)):
+            latitude2, longitude2 = radians[j]
+            a = (math.sin((latitude2 - latitude1) / 2) ** 2 +
+                 cosines[i] * cosines[j] * math.sin((longitude2 - longitude1) / 2) ** 2)
+            matrix[i][j] = matrix[j][i] = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+    return matrix
+
+def nearest_neighbor(matrix, start=0):
+    """Tour visiting every point, always moving to the closest unvisited one"""
+    route = [start]
+    remaining = set(range(len(matrix))) - {start}
+    while remaining:
+        row = matrix[route[-1]]
+        closest = min(remaining, key=row.__getitem__)
+        route.append(closest)
+        remaining.remove(closest)
+    return route
+
+def two_opt(matrix, route):
+    """Shorten a closed tour by reversing segments until no reversal helps
+
+    route[0] (the hotel) stays first.
+    """
+    route = list(route)
+    size = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, size - 1):
+            for j in range(i + 1, size):
+                a, b = route[i - 1], route[i]
+                c, d = route[j], route[(j + 1) % size]
+                if matrix[a][c] + matrix[b][d] < matrix[a][b] + matrix[c][d] - 1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    improved = True
+    return route
+
+def solve_route(matrix):
+    """Short closed tour from point 0 (nearest neighbor, then 2-opt)"""
+    return two_opt(matrix, nearest_neighbor(matrix))
+
+def _stay_dates(start_date, end_date):
+    """Every date from arrival to departure (just the arrival date if open-ended)"""
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return ['']
+    try:
+        end = max(start, datetime.strptime(end_date, '%Y-%m-%d').date())
+    except (TypeError, ValueError):
+        end = start
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+def _submatrix(matrix, indices):
+    return [[matrix[i][j] for j in indices] for i in indices]
+
+def build_itinerary(hotels, activities, start_date, end_date=''):
+    """Day-by-day plan for a stay, or None if no activity has coordinates
+
+    Activities are routed from the first hotel with coordinates. One tour
+    through all of them is cut into consecutive runs of near-equal size, one
+    run per day (route first, cluster second), and each day's run is then
+    re-optimized as its own round trip from the hotel. Without a hotel, a
+    zero-distance depot turns the round trips into open walks.
+    """
+    hotel = next((hotel for hotel in hotels if coordinates(hotel.location)), None)
+    located = [(activity, coordinates(activity.location)) for activity in activities]
+    places = [(activity, point) for activity, point in located if point]
+    unscheduled = [activity.name for activity, point in located if not point]
+    if not places:
+        return None
+
+    dates = _stay_dates(start_date, end_date)
+    capacity = len(dates) * Config.ITINERARY_MAX_PER_DAY
+    unscheduled.extend(activity.name for activity, _ in places[capacity:])
+    places = places[:capacity]
+
+    points = [point for _, point in places]
+    if hotel:
+        matrix = distance_matrix([coordinates(hotel.location)] + points)
+    else:
+        matrix = [[0.0] * (len(points) + 1)] + [[0.0] + row for row in distance_matrix(points)]
+
+    tour = solve_route(matrix)[1:]
+    day_count = min(len(dates), len(tour))
+    size, extra = divmod(len(tour), day_count)
+
+    itinerary = Itinerary(hotel=hotel.name if hotel else None, unscheduled=unscheduled)
+    position = 0
+    for index in range(day_count):
+        run = tour[position:position + size + (index < extra)]
+        position += len(run)
+
+        stops = [0] + run
+        route = solve_route(_submatrix(matrix, stops))
+        day = ItineraryDay(day=index + 1, date=dates[index])
+        previous = 0
+        distance = 0.0
+        for node in route[1:]:
+            point = stops[node]
+            activity, (latitude, longitude) = places[point - 1]
+            day.stops.append(ItineraryStop(activity.name, latitude, longitude, round(matrix[previous][point], 2)))
+            distance += matrix[previous][point]
+            previous = point
+        day.distance_km = round(distance + matrix[previous][0], 2)
+        itinerary.days.append(day)
+
+    itinerary.distance_km = round(sum(day.distance_km for day in itinerary.days), 2)
+    logger.debug("Itinerary built", extra={'fields': {
+        'activities': len(places), 'days': day_count, 'distance_km': itinerary.distance_km}})
+    return itinerary
@@ -0,0 +1,140 @@
+# json_stream.py
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]}'
+
+class _TextStream:
+    """Incrementally decoded text buffer over an iterable of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, min_chars=1):
+        """Append at least min_chars of text (or the rest of the input) to the buffer
+
+        Returns False once the input is exhausted and nothing was added.
+        """
+        if self.eof:
+            return False
+
+        # Drop consumed text so the buffer stays around one item in size
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        parts = []
+        added = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                parts.append(text)
+                added += len(text)
+                if added >= min_chars:
+                    break
+        else:
+            parts.append(self._utf8.decode(b'', final=True))
+            self.eof = True
+
+        self.buf += ''.join(parts)
+        return added > 0
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        """Consume one structural character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value at the current position
+
+        An incomplete value is retried after at least doubling the buffered
+        text, so a value spanning many chunks costs O(log n) decode attempts
+        (O(n) work overall) rather than one attempt per chunk.
+        """
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            # A number cut at the chunk edge ("1" of "1.5") decodes early; make sure
+            # it is followed by a delimiter before accepting it
+            if (isinstance(obj, (int, float)) and not self.eof and
+                    (end == len(self.buf) or self.buf[end] not in _DELIMITERS)):
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+def parse_object_stream(chunks, array_key, limit=None):
+    """Parse a top-level JSON object from byte chunks, keeping at most `limit`
+    items of the array under `array_key`.
+
+    Items are decoded one at a time, so peak memory is bounded by the kept
+    items plus the largest single item, whatever the payload size. Each item
+    is buffered whole before decoding, so an item larger than a chunk holds
+    up to about twice its size in text while it is read. Items past
+    the limit are decoded and dropped (other keys such as lookup dictionaries
+    may follow the array). Returns (obj, total_items_seen).
+    """
+    stream = _TextStream(chunks)
+    result = {}
+    seen = 0
+
+    stream.expect('{')
+    if stream.peek() == '}':
+        return result, seen
+
+    while True:
+        key = stream.value()
+        stream.expect(':')
+
+        if key == array_key and stream.peek() == '[':
+            stream.expect('[')
+            items = []
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    item = stream.value()
+                    seen += 1
+                    if limit is None or len(items) < limit:
+                        items.append(item)
+                    del item
+
+                    separator = stream.peek()
+                    stream.pos += 1
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise ValueError(f"Expected ',' or ']' in JSON stream, found {separator!r}")
+            result[key] = items
+        else:
+            result[key] = stream.value()
+
+        separator = stream.peek()
+        stream.pos += 1
+        if separator == '}':
+            return result, seen
+        if separator != ',':
+            raise ValueError(f"Expected ',' or '}}' in JSON stream, found {separator!r}")
@@ -0,0 +1,214 @@
+# metrics.py
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import Config
+
+# Trace ID of the request being handled (propagated into spans and logs)
+trace_id_var = ContextVar('trace_id', default=None)
+
+# Client-supplied trace IDs end up in logs, spans and profile file names
+TRACE_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labelnames, values, extra=None):
+    """Render a Prometheus label set"""
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{k}="{str(v)}"'.replace('\n', ' ') for k, v in pairs)
+    return '{' + body + '}'
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Increment the counter for a label set"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        """Render in Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+class Gauge:
+    """Point-in-time value with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *labels):
+        """Set the gauge for a label set"""
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        """Render in Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Record one observation for a label set"""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        """Render in Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', '+Inf'))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series['count']}")
+        return lines
+
+class Registry:
+    """Collection of metrics exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'tripplanner_http_requests_total', 'HTTP requests handled', ['endpoint', 'method', 'status'])
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'tripplanner_http_request_seconds', 'HTTP request latency', ['endpoint'])
+STAGE_SECONDS = REGISTRY.histogram(
+    'tripplanner_stage_seconds', 'Time spent in each planning stage', ['stage'])
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    'tripplanner_upstream_seconds', 'Upstream API call latency', ['upstream', 'status'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'tripplanner_cache_requests_total', 'Cache lookups by result', ['cache', 'result'])
+SAMPLE_FALLBACKS = REGISTRY.counter(
+    'tripplanner_sample_fallbacks_total', 'Sections served from sample data', ['section'])
+PDF_BYTES = REGISTRY.histogram(
+    'tripplanner_pdf_bytes', 'Generated PDF size in bytes', ['font'],
+    buckets=(2 ** 10, 2 ** 12, 2 ** 14, 2 ** 16, 2 ** 18, 2 ** 20, 2 ** 22))
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    'tripplanner_admission_in_flight', 'Plan requests currently being processed')
+ADMISSION_QUEUED = REGISTRY.gauge(
+    'tripplanner_admission_queued', 'Plan requests waiting for admission')
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    'tripplanner_admission_wait_seconds', 'Time spent waiting for admission')
+ADMISSION_REJECTED = REGISTRY.counter(
+    'tripplanner_admission_rejected_total', 'Requests shed with 503', ['reason'])
+DEGRADED_REQUESTS = REGISTRY.counter(
+    'tripplanner_degraded_requests_total', 'Requests served with a feature dropped under load', ['feature'])
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    'tripplanner_log_records_dropped_total', 'Log records dropped because the log queue was full', ['level'])
+PROFILES_CAPTURED = REGISTRY.counter(
+    'tripplanner_profiles_total', 'Requests profiled with cProfile', ['trigger'])
+
+def new_trace_id():
+    """Generate a trace ID"""
+    return uuid.uuid4().hex
+
+def trace_id_from_header(value):
+    """The client's X-Request-ID if it is a safe ID ([A-Za-z0-9_-], up to 64), else a new one"""
+    if isinstance(value, str) and TRACE_ID.fullmatch(value):
+        return value
+    return new_trace_id()
+
+_trace_logger = logging.getLogger('trace')
+
+def _emit_span(record):
+    """Write a trace-correlated span record"""
+    if Config.TRACE_LOG_ENABLED:
+        _trace_logger.info('span %s', record['span'], extra={'fields': record})
+
+@contextmanager
+def span(stage, upstream=None):
+    """Time a stage; upstream calls may set info['status'] on the yielded dict"""
+    info = {'status': 'ok'}
+    start = time.perf_counter()
+    try:
+        yield info
+    except Exception:
+        info['status'] = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        if upstream:
+            UPSTREAM_SECONDS.observe(elapsed, upstream, str(info['status']))
+        _emit_span({
+            'trace_id': trace_id_var.get(),
+            'span': stage,
+            'duration_ms': round(elapsed * 1000, 3),
+            'status': str(info['status'])
+        })
+
+def record_cache(cache, hit):
+    """Count a cache lookup"""
+    CACHE_REQUESTS.inc(cache, 'hit' if hit else 'miss')
@@ -0,0 +1,361 @@
+# models.py
+import json
+import re
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from config import Config
+from currency import RATES, normalize_currency
+from rules import INTERESTS
+
+# Optional fast JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Field names per model class, in declaration order (used by the serializer)
+_MODEL_FIELDS = {}
+
+def model(cls):
+    """Slotted dataclass registered with the serializer"""
+    cls = dataclass(slots=True)(cls)
+    _MODEL_FIELDS[cls] = tuple(f.name for f in fields(cls))
+    return cls
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+################### Plan model ###################
+
+@model
+class Flight:
+    airline: str = 'Unknown'
+    flight_number: str = ''
+    price: str = 'N/A'
+    currency: str = Config.BASE_CURRENCY
+    departure_time: str = 'N/A'
+    arrival_time: str = 'N/A'
+    departure_airport: str = 'N/A'
+    arrival_airport: str = 'N/A'
+    duration: str = 'N/A'
+    stops: int = 0
+    is_sample: bool = False
+    departure_time_display: str | None = None
+    arrival_time_display: str | None = None
+
+@model
+class Hotel:
+    name: str = 'Hotel'
+    hotel_id: str = ''
+    chain: str = ''
+    address: dict = field(default_factory=dict)
+    location: dict = field(default_factory=dict)
+    distance: dict = field(default_factory=dict)
+    is_sample: bool = False
+    formatted_address: str = 'Address not available'
+    formatted_distance: str = ''
+
+@model
+class Activity:
+    name: str = 'Activity'
+    description: str = 'No description available'
+    price: str = 'N/A'
+    currency: str = 'EUR'
+    duration: str = 'Not specified'
+    booking_link: str = '#'
+    location: dict = field(default_factory=dict)
+    is_sample: bool = False
+
+@model
+class ForecastDay:
+    date: str
+    date_display: str
+    avg_temp: float
+    min_temp: float
+    max_temp: float
+    condition: str
+    icon: str
+    source: str | None = None  # 'normals' for days filled from climate normals
+
+@model
+class Weather:
+    city: str
+    overview: dict
+    daily_forecast: list = field(default_factory=list)
+    packing_recommendations: list = field(default_factory=list)
+    unit: str = '°C'
+    is_sample: bool = False
+    source: str = 'forecast'
+
+@model
+class ItineraryStop:
+    name: str
+    latitude: float
+    longitude: float
+    distance_km: float = 0.0
+
+@model
+class ItineraryDay:
+    day: int
+    date: str
+    stops: list = field(default_factory=list)
+    distance_km: float = 0.0
+
+@model
+class Itinerary:
+    days: list = field(default_factory=list)
+    hotel: str | None = None
+    distance_km: float = 0.0
+    unscheduled: list = field(default_factory=list)
+
+@model
+class TripInfo:
+    origin: str
+    origin_code: str
+    destination: str
+    destination_code: str
+    departure_date: str
+    return_date: str = ''
+    travelers: int = 1
+    budget: str = 'medium'
+    interests: list = field(default_factory=list)
+    trip_type: str | None = None
+
+@model
+class Leg:
+    origin: str
+    origin_code: str
+    destination: str
+    destination_code: str
+    departure_date: str
+    flights: list = field(default_factory=list)
+
+@model
+class Stop:
+    city: str
+    code: str
+    arrival_date: str
+    departure_date: str = ''
+    hotels: list = field(default_factory=list)
+    activities: list = field(default_factory=list)
+    attractions: list = field(default_factory=list)
+    weather: Weather | None = None
+    itinerary: Itinerary | None = None
+
+@model
+class TripPlan:
+    trip_info: TripInfo
+    flights: list = field(default_factory=list)
+    hotels: list = field(default_factory=list)
+    attractions: list = field(default_factory=list)
+    activities: list = field(default_factory=list)
+    packing_list: dict = field(default_factory=dict)
+    weather: Weather | None = None
+    itinerary: Itinerary | None = None
+    currency: str = Config.BASE_CURRENCY
+    omitted_sections: list = field(default_factory=list)
+    fallback_sections: list = field(default_factory=list)
+    created_at: str = field(default_factory=_now)
+    legs: list | None = None
+    stops: list | None = None
+
+################### Serialization ###################
+
+def to_dict(obj):
+    """Plain dicts/lists for a model tree; fields that are None are left out"""
+    names = _MODEL_FIELDS.get(type(obj))
+    if names is not None:
+        result = {}
+        for name in names:
+            value = getattr(obj, name)
+            if value is not None:
+                result[name] = to_dict(value)
+        return result
+    if type(obj) is list:
+        return [to_dict(item) for item in obj]
+    return obj
+
+def dumps(obj, sort_keys=False):
+    """Serialize plain data and/or models to compact JSON bytes
+
+    The one JSON encoder for responses and the plan store; models are
+    flattened with to_dict so both paths produce the same shape.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=to_dict, option=option)
+    return json.dumps(obj, default=to_dict, separators=(',', ':'), ensure_ascii=False,
+                      sort_keys=sort_keys).encode('utf-8')
+
+################### Request validation ###################
+
+IATA_CODE = re.compile(r'[A-Z]{3}')
+PLACE_NAME = re.compile(r"[^\W\d_](?:[^\W\d_]|[ .,'()-])*")
+BUDGETS = ('low', 'medium', 'high')
+
+# Interests a request may name
+KNOWN_INTERESTS = INTERESTS
+
+class ValidationError(ValueError):
+    """Raised for a malformed /plan request; carries every problem found"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+@model
+class LegRequest:
+    origin: str
+    destination: str
+    departure_date: str
+
+@model
+class PlanRequest:
+    origin: str = ''
+    destination: str = ''
+    departure_date: str = ''
+    return_date: str = ''
+    travelers: int = 1
+    budget: str = 'medium'
+    interests: list = field(default_factory=list)
+    currency: str | None = None
+    legs: list | None = None
+
+def _place(value, name, errors):
+    """City name or IATA code, with whitespace collapsed"""
+    if not isinstance(value, str) or not value.strip():
+        errors.append(f"{name}: required")
+        return ''
+    value = ' '.join(value.split())
+    if len(value) == 3 and IATA_CODE.fullmatch(value):
+        return value
+    if len(value) > Config.MAX_PLACE_LENGTH or not PLACE_NAME.fullmatch(value):
+        errors.append(f"{name}: not a city name or 3-letter airport code")
+    return value
+
+def _date(value, name, errors, required=True):
+    """A YYYY-MM-DD date (None when missing or invalid)"""
+    if value in (None, ''):
+        if required:
+            errors.append(f"{name}: required")
+        return None
+    try:
+        # Not date.fromisoformat: since 3.11 it also takes forms like '2026-W50-1'.
+        # strptime alone lets through '2026-11-1' and non-ASCII digits.
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+        if day.isoformat() != value:
+            raise ValueError
+        return day
+    except (TypeError, ValueError):
+        errors.append(f"{name}: must be a date (YYYY-MM-DD)")
+        return None
+
+def _check_bookable(day, name, today, errors):
+    if day is None:
+        return
+    if day < today:
+        errors.append(f"{name}: cannot be in the past")
+    elif day > today + timedelta(days=Config.MAX_BOOKING_DAYS):
+        errors.append(f"{name}: at most {Config.MAX_BOOKING_DAYS} days ahead")
+
+def _travelers(value, errors):
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= Config.MAX_TRAVELERS:
+        errors.append(f"travelers: must be a whole number from 1 to {Config.MAX_TRAVELERS}")
+        return 1
+    return value
+
+def _interests(value, errors):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        errors.append("interests: must be a list")
+        return []
+    interests = []
+    for item in value:
+        interest = item.strip().lower() if isinstance(item, str) else None
+        if interest not in KNOWN_INTERESTS:
+            errors.append(f"interests: unknown interest {item!r}")
+        elif interest not in interests:
+            interests.append(interest)
+    return interests
+
+def _legs(value, today, errors):
+    if not isinstance(value, list) or not value:
+        errors.append("legs: must be a non-empty list")
+        return None
+    if len(value) > Config.MAX_TRIP_LEGS:
+        errors.append(f"legs: at most {Config.MAX_TRIP_LEGS} legs")
+        return None
+
+    legs = []
+    previous = None
+    for index, leg in enumerate(value):
+        name = f"legs[{index}]"
+        if not isinstance(leg, dict):
+            errors.append(f"{name}: must be an object")
+            continue
+        origin = _place(leg.get('origin'), f"{name}.origin", errors)
+        destination = _place(leg.get('destination'), f"{name}.destination", errors)
+        if origin and origin.lower() == destination.lower():
+            errors.append(f"{name}: origin and destination are the same")
+        departure = _date(leg.get('departure_date'), f"{name}.departure_date", errors)
+        _check_bookable(departure, f"{name}.departure_date", today, errors)
+        if departure and previous and departure < previous:
+            errors.append(f"{name}.departure_date: before the previous leg")
+        previous = departure or previous
+        legs.append(LegRequest(origin, destination, departure.isoformat() if departure else ''))
+    return legs
+
+def parse_plan_request(data, today=None):
+    """Validate and normalize a /plan body
+
+    Every field is checked in one pass so the client sees all problems at
+    once; raises ValidationError before anything is sent upstream.
+    """
+    if not isinstance(data, dict):
+        raise ValidationError(["request body must be a JSON object"])
+
+    today = today or date.today()
+    errors = []
+    plan_request = PlanRequest(
+        travelers=_travelers(data.get('travelers', 1), errors),
+        interests=_interests(data.get('interests'), errors)
+    )
+
+    budget = data.get('budget', 'medium')
+    if budget not in BUDGETS:
+        errors.append(f"budget: must be one of {', '.join(BUDGETS)}")
+    else:
+        plan_request.budget = budget
+
+    currency = normalize_currency(data.get('currency'))
+    if currency and not RATES.supports(currency):
+        errors.append(f"currency: unsupported currency {currency}")
+    plan_request.currency = currency
+
+    if 'legs' in data:
+        plan_request.legs = _legs(data['legs'], today, errors)
+    else:
+        plan_request.origin = _place(data.get('origin'), 'origin', errors)
+        plan_request.destination = _place(data.get('destination'), 'destination', errors)
+        if plan_request.origin and plan_request.origin.lower() == plan_request.destination.lower():
+            errors.append("destination: same as origin")
+
+        departure = _date(data.get('departure_date'), 'departure_date', errors)
+        _check_bookable(departure, 'departure_date', today, errors)
+        return_date = _date(data.get('return_date'), 'return_date', errors, required=False)
+        if departure and return_date:
+            if return_date < departure:
+                errors.append("return_date: before departure_date")
+            elif (return_date - departure).days > Config.MAX_TRIP_DAYS:
+                errors.append(f"return_date: trips are limited to {Config.MAX_TRIP_DAYS} days")
+        plan_request.departure_date = departure.isoformat() if departure else ''
+        plan_request.return_date = return_date.isoformat() if return_date else ''
+
+    if errors:
+        raise ValidationError(errors)
+    return plan_request
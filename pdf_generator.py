@@ -1,14 +1,109 @@
 # pdf_generator.py
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
 import os
+import threading
+import time
+from xml.sax.saxutils import escape
 from config import Config
+from metrics import span, PDF_BYTES
+from currency import format_price
+from logger import get_logger
 
-def generate_pdf(trip_plan, filename=None):
-    """Generate PDF trip plan"""
+logger = get_logger(__name__)
+
+# Bundled font family for PDF_FONT=unicode: (ReportLab name, file in PDF_FONT_DIR)
+UNICODE_FONT = ('DejaVuSans', 'DejaVuSans.ttf')
+UNICODE_BOLD_FONT = ('DejaVuSans-Bold', 'DejaVuSans-Bold.ttf')
+
+# Emoji variation selectors mean nothing once the emoji itself is dropped
+_ALWAYS_DROP = {0xFE0E, 0xFE0F}
+
+_fonts = {}
+_fonts_lock = threading.Lock()
+
+class _FontSet:
+    """Regular/bold font names plus the characters they can draw"""
+
+    def __init__(self, mode, regular, bold, covers):
+        self.mode = mode
+        self.regular = regular
+        self.bold = bold
+        self.covers = covers
+
+    def text(self, value):
+        """Text with characters the font has no glyph for removed"""
+        value = str(value)
+        kept = ''.join(ch for ch in value if self.covers(ord(ch)))
+        return ' '.join(kept.split()) if len(kept) != len(value) else kept
+
+    def price(self, price, currency):
+        """Formatted price, with the ISO code if the font lacks the currency symbol"""
+        text = format_price(price, currency)
+        return text if self.text(text) == text else format_price(price, currency, symbol=False)
+
+def _builtin_fonts():
+    # The standard Type 1 fonts are drawn with WinAnsi (cp1252) encoding
+    def covers(code):
+        if code in _ALWAYS_DROP:
+            return False
+        try:
+            chr(code).encode('cp1252')
+            return True
+        except UnicodeEncodeError:
+            return False
+    return _FontSet('builtin', 'Helvetica', 'Helvetica-Bold', covers)
+
+def _unicode_fonts():
+    # ReportLab embeds only the glyphs a document uses (subsetting is automatic for TTFs)
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.fonts import addMapping
+
+    regular = TTFont(UNICODE_FONT[0], os.path.join(Config.PDF_FONT_DIR, UNICODE_FONT[1]))
+    bold = TTFont(UNICODE_BOLD_FONT[0], os.path.join(Config.PDF_FONT_DIR, UNICODE_BOLD_FONT[1]))
+    pdfmetrics.registerFont(regular)
+    pdfmetrics.registerFont(bold)
+    # No oblique face is bundled, so <i> falls back to the upright one
+    addMapping(regular.fontName, 0, 0, regular.fontName)
+    addMapping(regular.fontName, 0, 1, regular.fontName)
+    addMapping(regular.fontName, 1, 0, bold.fontName)
+    addMapping(regular.fontName, 1, 1, bold.fontName)
+
+    glyphs = frozenset(regular.face.charToGlyph).intersection(bold.face.charToGlyph) - _ALWAYS_DROP
+    return _FontSet('unicode', regular.fontName, bold.fontName, glyphs.__contains__)
+
+def get_fonts(mode=None):
+    """Fonts for a PDF_FONT mode ('unicode' or 'builtin'), registered once per process"""
+    mode = mode or Config.PDF_FONT
+    fonts = _fonts.get(mode)
+    if fonts is not None:
+        return fonts
+    with _fonts_lock:
+        if mode not in _fonts:
+            fonts = None
+            if mode == 'unicode':
+                try:
+                    fonts = _unicode_fonts()
+                except Exception as e:
+                    logger.error("Could not load PDF fonts from %s, using Helvetica: %s", Config.PDF_FONT_DIR, e)
+            _fonts[mode] = fonts or _builtin_fonts()
+        return _fonts[mode]
+
+def preload():
+    """Import the ReportLab stack and load fonts ahead of the first PDF (e.g. during warm-up)"""
+    import reportlab.platypus
+    import reportlab.lib.styles
+    get_fonts()
+
+def generate_pdf(trip_plan, filename=None, font=None, page_compression=None):
+    """Generate PDF trip plan
+
+    `font` and `page_compression` default to PDF_FONT and PDF_PAGE_COMPRESSION.
+    """
+    # ReportLab is heavy; import it on first use rather than at startup
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
     
     # Ensure directory exists
     Config.ensure_directories()
@@ -23,17 +118,34 @@ def generate_pdf(trip_plan, filename=None):
     filepath = os.path.join(Config.PDF_OUTPUT_DIR, filename)
     
     # Create PDF
-    doc = SimpleDocTemplate(filepath, pagesize=letter)
+    fonts = get_fonts(font)
+    if page_compression is None:
+        page_compression = Config.PDF_PAGE_COMPRESSION
+    doc = SimpleDocTemplate(filepath, pagesize=letter, pageCompression=int(page_compression),
+                            initialFontName=fonts.regular)
     styles = getSampleStyleSheet()
+    for style in styles.byName.values():
+        if hasattr(style, 'fontName'):
+            style.fontName = fonts.bold if 'Bold' in style.fontName else fonts.regular
     story = []
     
+    def para(text, style):
+        # Drop characters (e.g. emoji) the font would draw as junk
+        return Paragraph(fonts.text(text), style)
+    
+    # Route separator; the builtin fonts have no arrow glyph
+    arrow = ' → ' if fonts.covers(ord('→')) else ' > '
+    
+    def table_style(*commands):
+        return TableStyle([('FONTNAME', (0, 0), (-1, -1), fonts.regular)] + list(commands))
+    
     # Title
-    title = Paragraph(f"✈️ Trip Plan: {trip_plan['trip_info']['destination']}", styles['Title'])
+    title = para(f"✈️ Trip Plan: {trip_plan['trip_info']['destination']}", styles['Title'])
     story.append(title)
     story.append(Spacer(1, 20))
     
     # Trip Information
-    story.append(Paragraph("📍 Trip Information", styles['Heading2']))
+    story.append(para("📍 Trip Information", styles['Heading2']))
     story.append(Spacer(1, 10))
     
     trip_info = trip_plan['trip_info']
@@ -46,74 +158,153 @@ def generate_pdf(trip_plan, filename=None):
         ["Budget:", trip_info['budget'].title()]
     ]
     
-    info_table = Table(info_data, colWidths=[100, 300])
-    info_table.setStyle(TableStyle([
+    info_table = Table([[fonts.text(cell) for cell in row] for row in info_data], colWidths=[100, 300])
+    info_table.setStyle(table_style(
         ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
         ('GRID', (0, 0), (-1, -1), 1, colors.grey),
         ('PADDING', (0, 0), (-1, -1), 8),
-    ]))
+    ))
     
     story.append(info_table)
     story.append(Spacer(1, 20))
     
-    # Flights
-    if trip_plan['flights']:
-        story.append(Paragraph("✈️ Flight Options", styles['Heading2']))
-        story.append(Spacer(1, 10))
-        
-        if trip_plan['flights'][0].get('is_sample'):
-            story.append(Paragraph("<i>Sample flight data shown</i>", styles['Italic']))
-            story.append(Spacer(1, 5))
-        
+    def flight_table(flights):
+        """Table of the top flight options"""
         flight_data = [["Airline", "Flight", "Departure", "Arrival", "Price"]]
         
-        for flight in trip_plan['flights'][:3]:
+        for flight in flights[:3]:
             flight_data.append([
-                flight['airline'],
+                fonts.text(flight['airline']),
                 flight['flight_number'],
                 flight.get('departure_time_display', flight['departure_time'])[:16],
                 flight.get('arrival_time_display', flight['arrival_time'])[:16],
-                f"${flight['price']}"
+                fonts.price(flight['price'], flight.get('currency', Config.BASE_CURRENCY))
             ])
         
-        flight_table = Table(flight_data, colWidths=[80, 60, 80, 80, 60])
-        flight_table.setStyle(TableStyle([
+        table = Table(flight_data, colWidths=[80, 60, 80, 80, 60])
+        table.setStyle(table_style(
+            ('FONTNAME', (0, 0), (-1, 0), fonts.bold),
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4A6FA5')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
             ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#E8EEF4')),
             ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
+        ))
+        return table
+    
+    def itinerary_paragraphs(itinerary):
+        """One line per day: the day's route and distance"""
+        # Hotel and activity names come from upstream; escape them before adding markup
+        paragraphs = []
+        if itinerary.get('hotel'):
+            paragraphs.append(para(f"<i>Each day starts and ends at {escape(itinerary['hotel'])}</i>", styles['Italic']))
+        for day in itinerary['days']:
+            label = f"Day {day['day']}" + (f" ({escape(day['date'])})" if day['date'] else '')
+            route = escape(arrow.join(stop['name'] for stop in day['stops']))
+            paragraphs.append(para(f"<b>{label}:</b> {route} — {day['distance_km']:.1f} km", styles['Normal']))
+        if itinerary['unscheduled']:
+            paragraphs.append(para(f"<i>Not scheduled: {escape(', '.join(itinerary['unscheduled']))}</i>",
+                                   styles['Italic']))
+        return paragraphs
+    
+    # Flights
+    if trip_plan['flights']:
+        story.append(para("✈️ Flight Options", styles['Heading2']))
+        story.append(Spacer(1, 10))
+        
+        if trip_plan['flights'][0].get('is_sample'):
+            story.append(para("<i>Sample flight data shown</i>", styles['Italic']))
+            story.append(Spacer(1, 5))
+        
+        story.append(flight_table(trip_plan['flights']))
+        story.append(Spacer(1, 20))
+    
+    # Day-by-day itinerary
+    if trip_plan.get('itinerary'):
+        story.append(para("🗺️ Day-by-Day Itinerary", styles['Heading2']))
+        story.append(Spacer(1, 10))
+        story.extend(itinerary_paragraphs(trip_plan['itinerary']))
+        story.append(Spacer(1, 20))
+    
+    # Multi-city legs
+    if trip_plan.get('legs'):
+        story.append(para("✈️ Itinerary", styles['Heading2']))
+        story.append(Spacer(1, 10))
+        
+        for index, leg in enumerate(trip_plan['legs'], 1):
+            route = escape(f"{leg['origin']} ({leg['origin_code']}){arrow}{leg['destination']} ({leg['destination_code']})")
+            story.append(para(f"<b>Leg {index}: {route}</b> — {escape(leg['departure_date'])}", styles['Normal']))
+            story.append(Spacer(1, 5))
+            if leg['flights']:
+                story.append(flight_table(leg['flights']))
+            else:
+                story.append(para("<i>No flights found</i>", styles['Italic']))
+            story.append(Spacer(1, 10))
+        
+        story.append(Spacer(1, 10))
+    
+    # Multi-city stops (names come from upstream; escape them before adding markup)
+    for stop in trip_plan.get('stops', []):
+        dates = stop['arrival_date'] + (f" to {stop['departure_date']}" if stop['departure_date'] else '')
+        story.append(para(escape(f"📍 {stop['city']} ({stop['code']})"), styles['Heading2']))
+        story.append(para(escape(dates), styles['Normal']))
+        story.append(Spacer(1, 5))
+        
+        overview = stop.get('weather', {}).get('overview')
+        if overview:
+            story.append(para(
+                f"<b>Weather:</b> {escape(overview['temperature'])}, {escape(overview['conditions'])}", styles['Normal']))
+        if stop['hotels']:
+            names = ', '.join(hotel['name'] for hotel in stop['hotels'][:3])
+            story.append(para(f"<b>Hotels:</b> {escape(names)}", styles['Normal']))
+        if stop['activities']:
+            names = ', '.join(activity['name'] for activity in stop['activities'][:3])
+            story.append(para(f"<b>Activities:</b> {escape(names)}", styles['Normal']))
+        if stop.get('itinerary'):
+            story.append(Spacer(1, 5))
+            story.extend(itinerary_paragraphs(stop['itinerary']))
+            story.append(Spacer(1, 5))
+        for attraction in stop['attractions']:
+            story.append(para(f"• {escape(attraction)}", styles['Normal']))
         
-        story.append(flight_table)
         story.append(Spacer(1, 20))
     
     # Attractions
     if trip_plan['attractions']:
-        story.append(Paragraph("🏛️ Recommended Attractions", styles['Heading2']))
+        story.append(para("🏛️ Recommended Attractions", styles['Heading2']))
         story.append(Spacer(1, 10))
         
         for attraction in trip_plan['attractions']:
-            story.append(Paragraph(f"• {attraction}", styles['Normal']))
+            story.append(para(f"• {attraction}", styles['Normal']))
         
         story.append(Spacer(1, 20))
     
     # Packing List
     if trip_plan['packing_list']:
-        story.append(Paragraph("🧳 Packing List", styles['Heading2']))
+        story.append(para("🧳 Packing List", styles['Heading2']))
         story.append(Spacer(1, 10))
         
         for category, items in trip_plan['packing_list'].items():
-            story.append(Paragraph(f"<b>{category.title()}:</b>", styles['Normal']))
+            story.append(para(f"<b>{category.title()}:</b>", styles['Normal']))
             for item in items:
-                story.append(Paragraph(f"   ✓ {item}", styles['Normal']))
+                story.append(para(f"   ✓ {item}", styles['Normal']))
             story.append(Spacer(1, 5))
     
     # Footer
     story.append(Spacer(1, 30))
-    story.append(Paragraph(f"Generated on: {trip_plan['created_at']}", styles['Normal']))
-    story.append(Paragraph("Trip Planner Assistant", styles['Normal']))
+    story.append(para(f"Generated on: {trip_plan['created_at']}", styles['Normal']))
+    story.append(para("Trip Planner Assistant", styles['Normal']))
     
     # Build PDF
-    doc.build(story)
-    print(f"✅ PDF generated: {filepath}")
+    start = time.perf_counter()
+    with span('pdf.render'):
+        doc.build(story)
+    render_ms = (time.perf_counter() - start) * 1000
+    pdf_bytes = os.path.getsize(filepath)
+    PDF_BYTES.observe(pdf_bytes, fonts.mode)
+    logger.info("PDF generated: %s", filepath, extra={'fields': {
+        'pdf_bytes': pdf_bytes,
+        'render_ms': round(render_ms, 1),
+        'font': fonts.mode,
+        'page_compression': page_compression
+    }})
     return filename
\ No newline at end of file
@@ -0,0 +1,203 @@
+# plan_store.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from config import Config
+from models import dumps
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Top-level plan sections that can be requested through field projection
+PLAN_FIELDS = (
+    'trip_info', 'flights', 'hotels', 'attractions', 'activities',
+    'packing_list', 'weather', 'itinerary', 'legs', 'stops', 'currency',
+    'omitted_sections', 'fallback_sections', 'created_at'
+)
+
+class PlanStore:
+    """SQLite-backed plan store with batched (write-behind) inserts
+
+    Pending plans are written when a batch fills up and at least every
+    flush_interval seconds by a background thread, so other processes see
+    them shortly after they are saved. Call close() on shutdown.
+    """
+
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None):
+        self.db_path = db_path or Config.PLAN_DB_PATH
+        self.batch_size = batch_size or Config.PLAN_STORE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else Config.PLAN_STORE_FLUSH_INTERVAL
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = threading.Event()
+        self._init_db()
+        if self.flush_interval > 0:
+            threading.Thread(target=self._flush_periodically, name='plan-store-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Plan store flush failed: %s", e)
+
+    def close(self):
+        """Stop the background flusher and write anything still pending"""
+        self._closed.set()
+        self.flush()
+
+    def _connect(self):
+        """Get a per-thread connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        """Create tables if missing"""
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS plans ('
+            ' id TEXT PRIMARY KEY,'
+            ' data TEXT NOT NULL,'
+            ' pdf_filename TEXT,'
+            ' created_at TEXT NOT NULL,'
+            ' content_hash TEXT)'
+        )
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(plans)')}
+        if 'content_hash' not in columns:
+            conn.execute('ALTER TABLE plans ADD COLUMN content_hash TEXT')
+        conn.commit()
+
+    def new_id(self):
+        """Generate a new plan ID"""
+        return uuid.uuid4().hex
+
+    def save(self, trip_plan, pdf_filename=None, plan_id=None):
+        """Queue a plan for storage and return its ID"""
+        plan_id = plan_id or self.new_id()
+        data = dumps(trip_plan, sort_keys=True).decode('utf-8')
+        content_hash = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        row = (plan_id, data, pdf_filename, trip_plan.get('created_at', ''), content_hash)
+
+        with self._lock:
+            self._pending[plan_id] = (row, trip_plan)
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+
+        if due:
+            self.flush()
+        return plan_id
+
+    def flush(self):
+        """Write all pending plans in a single transaction
+
+        Plans stay readable from memory until the transaction has committed;
+        entries replaced meanwhile (e.g. by set_pdf_filename) stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._last_flush = time.monotonic()
+                if not self._pending:
+                    return 0
+                batch = dict(self._pending)
+
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO plans (id, data, pdf_filename, created_at, content_hash) VALUES (?, ?, ?, ?, ?)',
+                    [row for row, _ in batch.values()]
+                )
+
+            with self._lock:
+                for plan_id, entry in batch.items():
+                    if self._pending.get(plan_id) is entry:
+                        del self._pending[plan_id]
+            return len(batch)
+
+    def get(self, plan_id, fields=None):
+        """Get a stored plan, optionally projected to the given top-level fields"""
+        fields = [f for f in (fields or []) if f in PLAN_FIELDS]
+
+        with self._lock:
+            pending = self._pending.get(plan_id)
+        if pending:
+            plan = pending[1]
+            return {f: plan.get(f) for f in fields} if fields else plan
+
+        conn = self._connect()
+        if fields:
+            # Let SQLite extract only the requested sections from the JSON column
+            columns = ', '.join('json_extract(data, ?)' for _ in fields)
+            row = conn.execute(
+                f'SELECT {columns} FROM plans WHERE id = ?',
+                [f'$.{f}' for f in fields] + [plan_id]
+            ).fetchone()
+            if row is None:
+                return None
+            return {f: self._decode(value) for f, value in zip(fields, row)}
+
+        row = conn.execute('SELECT data FROM plans WHERE id = ?', (plan_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_meta(self, plan_id):
+        """Get (content_hash, created_at) for a plan without loading it"""
+        with self._lock:
+            pending = self._pending.get(plan_id)
+        if pending:
+            return pending[0][4], pending[0][3]
+
+        row = self._connect().execute(
+            'SELECT content_hash, created_at FROM plans WHERE id = ?', (plan_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] is None:
+            # Plans stored before content hashes were recorded
+            data = self._connect().execute('SELECT data FROM plans WHERE id = ?', (plan_id,)).fetchone()[0]
+            return hashlib.sha256(data.encode('utf-8')).hexdigest(), row[1]
+        return row[0], row[1]
+
+    def get_pdf_filename(self, plan_id):
+        """Get the PDF filename recorded for a plan"""
+        with self._lock:
+            pending = self._pending.get(plan_id)
+        if pending:
+            return pending[0][2]
+
+        row = self._connect().execute('SELECT pdf_filename FROM plans WHERE id = ?', (plan_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_pdf_filename(self, plan_id, pdf_filename):
+        """Record a (re)generated PDF for a plan"""
+        with self._lock:
+            pending = self._pending.get(plan_id)
+            if pending:
+                row, plan = pending
+                self._pending[plan_id] = ((row[0], row[1], pdf_filename, row[3], row[4]), plan)
+                return
+
+        conn = self._connect()
+        with conn:
+            conn.execute('UPDATE plans SET pdf_filename = ? WHERE id = ?', (pdf_filename, plan_id))
+
+    @staticmethod
+    def _decode(value):
+        """Decode a json_extract result (objects/arrays come back as JSON text)"""
+        if isinstance(value, str) and value[:1] in ('{', '['):
+            return json.loads(value)
+        return value
+
+def parse_fields(value):
+    """Parse a comma-separated ?fields= value"""
+    if not value:
+        return None
+    return [f.strip() for f in value.split(',') if f.strip()]
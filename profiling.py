@@ -0,0 +1,165 @@
+# profiling.py
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import sysconfig
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import Config
+from metrics import PROFILES_CAPTURED, trace_id_from_header
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Profile collecting for the request being handled, if any.
+# Copied into planner worker threads, which profile their own tasks.
+profile_var = ContextVar('profile', default=None)
+
+def is_admin(token):
+    """Whether a request carries the configured admin token"""
+    return bool(Config.ADMIN_TOKEN) and isinstance(token, str) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+def trigger(headers):
+    """Why a request should be profiled ('header' or 'sample'), or None"""
+    if 'X-Profile' in headers and is_admin(headers.get('X-Admin-Token')):
+        return 'header'
+    if Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+class RequestProfile:
+    """cProfile data for one request, gathered from every thread it ran on"""
+
+    def __init__(self, label, trace_id):
+        self.label = label
+        self.trace_id = trace_id
+        # The name becomes a file name, so never trust the ID to be path-safe
+        self.name = f"{time.strftime('%Y%m%d_%H%M%S')}_{trace_id_from_header(trace_id)}"
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def run(self, func, *args, **kwargs):
+        """Call func under a profiler of its own (cProfile is per thread)"""
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.add(profile)
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+def wrap(func):
+    """func, profiled if the current request is being profiled (a no-op otherwise)"""
+    profile = profile_var.get()
+    if profile is None:
+        return func
+    return lambda *args, **kwargs: profile.run(func, *args, **kwargs)
+
+@contextmanager
+def request_profile(label, reason, trace_id):
+    """Profile the block (and planner tasks it starts) when `reason` is set
+
+    Yields the RequestProfile, or None when the request isn't profiled.
+    """
+    if reason is None:
+        yield None
+        return
+
+    profile = RequestProfile(label, trace_id)
+    token = profile_var.set(profile)
+    start = time.perf_counter()
+    main = cProfile.Profile()
+    main.enable()
+    try:
+        yield profile
+    finally:
+        main.disable()
+        profile_var.reset(token)
+        profile.add(main)
+        PROFILES_CAPTURED.inc(reason)
+        try:
+            save(profile, reason, time.perf_counter() - start)
+        except Exception as e:
+            logger.error("Could not save profile %s: %s", profile.name, e)
+
+def save(profile, reason, wall_seconds):
+    """Write a profile and its metadata, dropping the oldest beyond PROFILE_MAX_FILES"""
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(Config.PROFILE_DIR, profile.name)
+    profile.stats().dump_stats(path + '.prof')
+    with open(path + '.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'id': profile.name,
+            'label': profile.label,
+            'trace_id': profile.trace_id,
+            'trigger': reason,
+            'wall_ms': round(wall_seconds * 1000, 1),
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }, f)
+    logger.info("Profile saved: %s", profile.name, extra={'fields': {'label': profile.label, 'trigger': reason}})
+
+    for name in list_profiles()[Config.PROFILE_MAX_FILES:]:
+        for extension in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(Config.PROFILE_DIR, name + extension))
+            except FileNotFoundError:
+                pass
+
+def list_profiles():
+    """Stored profile IDs, newest first"""
+    try:
+        names = [name[:-5] for name in os.listdir(Config.PROFILE_DIR) if name.endswith('.prof')]
+    except FileNotFoundError:
+        return []
+    return sorted(names, reverse=True)
+
+# Prefixes stripped from file names in summaries: the app, installed packages, the stdlib
+_PATH_ROOTS = (os.path.dirname(os.path.abspath(__file__)) + os.sep, 'site-packages' + os.sep,
+               sysconfig.get_paths()['stdlib'] + os.sep)
+
+def _short_path(filename):
+    """Path relative to the app, site-packages or stdlib, for readable function names"""
+    for root in _PATH_ROOTS:
+        if root in filename:
+            return filename.split(root, 1)[1]
+    return filename
+
+def summarize(profile_id, limit=None, sort='tottime'):
+    """Metadata and the hottest functions of a stored profile (None if missing)"""
+    path = os.path.join(Config.PROFILE_DIR, profile_id)
+    if os.path.basename(profile_id) != profile_id or not os.path.exists(path + '.prof'):
+        return None
+
+    try:
+        with open(path + '.json', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        summary = {'id': profile_id}
+
+    column = 3 if sort == 'cumtime' else 2
+    rows = sorted(pstats.Stats(path + '.prof').stats.items(), key=lambda item: item[1][column], reverse=True)
+    summary['sort'] = 'cumtime' if column == 3 else 'tottime'
+    summary['functions'] = [{
+        'function': f"{_short_path(filename)}:{line}({name})",
+        'calls': calls,
+        'tottime_ms': round(tottime * 1000, 3),
+        'cumtime_ms': round(cumtime * 1000, 3)
+    } for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:limit or Config.PROFILE_TOP_FUNCTIONS]]
+    return summary
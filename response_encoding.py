@@ -0,0 +1,130 @@
+# response_encoding.py
+import gzip
+from flask import Response, request
+from config import Config
+from http_cache import coded_etag
+from models import dumps
+
+# Optional compact codecs
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+COMPACT_MIMETYPE = 'application/vnd.tripplanner.compact+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Plan sections sent as column arrays in compact encodings
+COLUMNAR_SECTIONS = ('flights', 'hotels', 'activities')
+
+# Sections holding lists of sub-plans, and the columnar sections inside each
+NESTED_COLUMNAR_SECTIONS = {
+    'legs': ('flights',),
+    'stops': ('hotels', 'activities'),
+}
+
+# Fields left out of compact encodings (derivable on the client)
+COMPACT_DROP_FIELDS = {
+    'flights': ('departure_time_display', 'arrival_time_display'),
+    'hotels': ('address',),
+}
+
+def to_columnar(items, drop=()):
+    """Convert a list of dicts to {'columns', 'rows'} with is_sample hoisted"""
+    columns = []
+    seen = set(drop) | {'is_sample'}
+    for item in items:
+        for key in item:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+
+    return {
+        'columns': columns,
+        'rows': [[item.get(key) for key in columns] for item in items],
+        'is_sample': any(item.get('is_sample', False) for item in items)
+    }
+
+def _compact_sections(part, sections):
+    """Copy of a plan (or leg/stop) with the given sections made columnar"""
+    compact = dict(part)
+    for section in sections:
+        if isinstance(compact.get(section), list):
+            compact[section] = to_columnar(compact[section], COMPACT_DROP_FIELDS.get(section, ()))
+    return compact
+
+def compact_plan(trip_plan):
+    """Build the compact form of a (possibly projected) plan"""
+    compact = _compact_sections(trip_plan, COLUMNAR_SECTIONS)
+    for section, inner_sections in NESTED_COLUMNAR_SECTIONS.items():
+        if isinstance(compact.get(section), list):
+            compact[section] = [_compact_sections(part, inner_sections) for part in compact[section]]
+    return compact
+
+def negotiate_format():
+    """Pick the response format from ?format= or the Accept header"""
+    requested = request.args.get('format')
+    if requested == 'msgpack' and msgpack is not None:
+        return MSGPACK_MIMETYPE
+    if requested == 'compact':
+        return COMPACT_MIMETYPE
+    if requested == 'json':
+        return JSON_MIMETYPE
+
+    offered = [JSON_MIMETYPE, COMPACT_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+    best = request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    # Plain JSON wins ties (e.g. "*/*")
+    if best != JSON_MIMETYPE and request.accept_mimetypes[best] <= request.accept_mimetypes[JSON_MIMETYPE]:
+        return JSON_MIMETYPE
+    return best
+
+def negotiate_encoding(size):
+    """Pick the content coding from Accept-Encoding"""
+    if size < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def encode_response(payload, status=200, etag=None, last_modified=None, max_age=None):
+    """Encode a response envelope containing an optional 'plan' section"""
+    mimetype = negotiate_format()
+
+    if mimetype != JSON_MIMETYPE and isinstance(payload.get('plan'), dict):
+        payload = dict(payload, plan=compact_plan(payload['plan']), encoding='compact')
+
+    if mimetype == MSGPACK_MIMETYPE:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = dumps(payload)
+
+    content_encoding = negotiate_encoding(len(body))
+    if content_encoding == 'br':
+        body = brotli.compress(body, quality=Config.RESPONSE_COMPRESSION_LEVEL)
+    elif content_encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=Config.RESPONSE_COMPRESSION_LEVEL)
+
+    response = Response(body, status=status, mimetype=mimetype)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    if etag:
+        response.set_etag(coded_etag(etag, content_encoding))
+    if last_modified:
+        response.last_modified = last_modified
+    if max_age is not None:
+        response.cache_control.private = True
+        response.cache_control.max_age = max_age
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,166 @@
+# rules.py
+import json
+from datetime import datetime
+from config import Config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Context dimensions a rule can be restricted on (rule['when'][dimension])
+DIMENSIONS = ('interests', 'destinations', 'seasons', 'weather')
+
+# Interests a plan request may name. This is the API's vocabulary: the rules
+# file may key rules on these only, and adding one is a deliberate API change.
+INTERESTS = frozenset({'adventure', 'art', 'beach', 'culture', 'family', 'food', 'hiking', 'history',
+                       'nature', 'nightlife', 'relaxation', 'shopping'})
+
+# Packing list categories in display order; categories not listed come after
+PACKING_CATEGORIES = ('essentials', 'clothing', 'toiletries', 'electronics', 'special')
+
+NORTHERN_SEASONS = {12: 'winter', 1: 'winter', 2: 'winter', 3: 'spring', 4: 'spring', 5: 'spring',
+                    6: 'summer', 7: 'summer', 8: 'summer', 9: 'autumn', 10: 'autumn', 11: 'autumn'}
+OPPOSITE_SEASONS = {'winter': 'summer', 'summer': 'winter', 'spring': 'autumn', 'autumn': 'spring'}
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+class RuleEngine:
+    """Rules compiled into per-dimension bitsets
+
+    Rules are ordered once by (priority desc, file order) and rule i owns bit i.
+    For every dimension there is one mask per value plus a mask of rules that
+    don't restrict that dimension, so matching a context is a handful of
+    integer ORs/ANDs however many rules there are, and matches always come
+    back in the same order.
+    """
+
+    def __init__(self, rules, southern_hemisphere=()):
+        ordered = sorted(enumerate(rules), key=lambda pair: (-pair[1].get('priority', 0), pair[0]))
+        self.rules = [rule for _, rule in ordered]
+        self.southern_hemisphere = {_normalize(name) for name in southern_hemisphere}
+        self._kinds = {}
+        self._index = {dimension: {} for dimension in DIMENSIONS}
+        self._unrestricted = dict.fromkeys(DIMENSIONS, 0)
+
+        for bit, rule in enumerate(self.rules):
+            flag = 1 << bit
+            self._kinds[rule['kind']] = self._kinds.get(rule['kind'], 0) | flag
+            when = rule.get('when', {})
+            for dimension in DIMENSIONS:
+                values = when.get(dimension)
+                if not values:
+                    self._unrestricted[dimension] |= flag
+                    continue
+                index = self._index[dimension]
+                for value in values:
+                    key = _normalize(value)
+                    index[key] = index.get(key, 0) | flag
+
+    def match(self, kind, **context):
+        """Rules of a kind matching the context, in priority order
+
+        Context values are iterables per dimension (e.g. interests=['food']);
+        a restricted rule matches if any of its values is present.
+        """
+        mask = self._kinds.get(kind, 0)
+        for dimension in DIMENSIONS:
+            if not mask:
+                break
+            allowed = self._unrestricted[dimension]
+            index = self._index[dimension]
+            for value in context.get(dimension) or ():
+                allowed |= index.get(_normalize(value), 0)
+            mask &= allowed
+
+        matched = []
+        while mask:
+            lowest = mask & -mask
+            matched.append(self.rules[lowest.bit_length() - 1])
+            mask ^= lowest
+        return matched
+
+    def values(self, dimension):
+        """Values any rule is keyed on for a dimension (normalized)"""
+        return frozenset(self._index[dimension])
+
+    def season(self, date_string, destinations=()):
+        """Season at the destination for a YYYY-MM-DD date (None if unknown)"""
+        try:
+            season = NORTHERN_SEASONS[datetime.strptime(date_string, '%Y-%m-%d').month]
+        except (TypeError, ValueError):
+            return None
+        if any(_normalize(name) in self.southern_hemisphere for name in destinations):
+            return OPPOSITE_SEASONS[season]
+        return season
+
+    def attractions(self, destination, destinations, interests, season, limit):
+        """Attraction suggestions, most specific first, without duplicates"""
+        attractions = []
+        seen = set()
+        for rule in self.match('attraction', interests=interests, destinations=destinations,
+                               seasons=[season] if season else ()):
+            for item in rule['items']:
+                item = item.replace('{destination}', destination)
+                if item not in seen:
+                    seen.add(item)
+                    attractions.append(item)
+                    if len(attractions) >= limit:
+                        return attractions
+        return attractions
+
+    def packing_list(self, destinations, interests, season):
+        """Packing list by category, each item listed once"""
+        packing_list = {}
+        seen = set()
+        for rule in self.match('packing', interests=interests, destinations=destinations,
+                               seasons=[season] if season else ()):
+            for item in rule['items']:
+                if item not in seen:
+                    seen.add(item)
+                    packing_list.setdefault(rule.get('category', 'special'), []).append(item)
+
+        order = {category: i for i, category in enumerate(PACKING_CATEGORIES)}
+        return {category: packing_list[category]
+                for category in sorted(packing_list, key=lambda c: order.get(c, len(order)))}
+
+    def weather_packing(self, weather_tags):
+        """Packing items and advice for forecast tags (e.g. ['cool', 'rain'])"""
+        items = []
+        advice = []
+        for rule in self.match('weather', weather=weather_tags):
+            for item in rule['items']:
+                if item not in items:
+                    items.append(item)
+            if rule.get('advice'):
+                advice.append(rule['advice'])
+        return {'recommendation': ' '.join(advice), 'items': items}
+
+def merge_packing(packing_list, items, category='weather'):
+    """Add items not already on the packing list under their own category"""
+    listed = {item for category_items in packing_list.values() for item in category_items}
+    extra = []
+    for item in items:
+        if item not in listed:
+            listed.add(item)
+            extra.append(item)
+    if extra:
+        packing_list[category] = packing_list.get(category, []) + extra
+    return packing_list
+
+def load_rules(path=None):
+    """Load and compile the rules file
+
+    Raises ValueError if a rule is keyed on an interest outside INTERESTS.
+    """
+    path = path or Config.RULES_PATH
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    engine = RuleEngine(document['rules'], document.get('southern_hemisphere', ()))
+    unknown = engine.values('interests') - INTERESTS
+    if unknown:
+        raise ValueError(f"{path}: rules keyed on unknown interests: {', '.join(sorted(unknown))}")
+    logger.debug("Rules compiled", extra={'fields': {'path': path, 'rules': len(engine.rules)}})
+    return engine
+
+# Compiled once at startup
+RULES = load_rules()
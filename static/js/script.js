@@ -93,6 +93,87 @@ function formatDate(dateString) {
     return new Date(dateString).toLocaleDateString('en-US', options);
 }
 
+// Format flight time like the server-side display form (e.g. "Nov 01, 10:00 AM")
+function formatFlightTime(value) {
+    const date = new Date(value);
+    if (isNaN(date)) {
+        return value;
+    }
+    return date.toLocaleString('en-US', { month: 'short', day: '2-digit', hour: '2-digit', minute: '2-digit', hour12: true });
+}
+
+// Format a price in its currency (e.g. "€123.45"); non-numeric prices are shown as is
+function formatPrice(price, currency) {
+    const amount = Number(price);
+    if (price === null || price === '' || isNaN(amount) || !currency) {
+        return price;
+    }
+    try {
+        return amount.toLocaleString('en-US', { style: 'currency', currency: currency });
+    } catch (error) {
+        return `${currency} ${price}`;
+    }
+}
+
+// Expand a {columns, rows, is_sample} section back into a list of objects
+function expandColumnar(section) {
+    if (!section || !Array.isArray(section.columns)) {
+        return section;
+    }
+    return section.rows.map(row => {
+        const item = { is_sample: section.is_sample };
+        section.columns.forEach((column, index) => {
+            item[column] = row[index];
+        });
+        return item;
+    });
+}
+
+// Decode a compact-encoded plan into the regular plan shape
+function decodePlan(plan, encoding) {
+    if (encoding !== 'compact') {
+        return plan;
+    }
+    
+    const decoded = Object.assign({}, plan);
+    ['flights', 'hotels', 'activities'].forEach(section => {
+        decoded[section] = expandColumnar(plan[section]);
+    });
+    decoded.legs = (plan.legs || []).map(leg => Object.assign({}, leg, { flights: expandColumnar(leg.flights) }));
+    decoded.stops = (plan.stops || []).map(stop => Object.assign({}, stop, {
+        hotels: expandColumnar(stop.hotels),
+        activities: expandColumnar(stop.activities)
+    }));
+    
+    (decoded.flights || []).concat(...decoded.legs.map(leg => leg.flights || [])).forEach(flight => {
+        ['departure_time', 'arrival_time'].forEach(key => {
+            if (flight[key] && flight[key] !== 'N/A' && !flight[`${key}_display`]) {
+                flight[`${key}_display`] = formatFlightTime(flight[key]);
+            }
+        });
+    });
+    
+    return decoded;
+}
+
+// Day-by-day itinerary (routes start and end at the hotel when there is one)
+function renderItinerary(itinerary) {
+    if (!itinerary || !itinerary.days || itinerary.days.length === 0) {
+        return '';
+    }
+    return `
+        ${itinerary.hotel ? `<p style="color: #666;"><small><i class="fas fa-hotel"></i> Each day starts and ends at ${itinerary.hotel}</small></p>` : ''}
+        ${itinerary.days.map(day => `
+            <div class="activity-item">
+                <strong>Day ${day.day}${day.date ? ` • ${formatDate(day.date)}` : ''}</strong>
+                <small style="color: #666;"> • ${day.distance_km.toFixed(1)} km</small>
+                <div style="margin-top: 5px; color: #555;">${day.stops.map(stop => stop.name).join(' → ')}</div>
+            </div>
+        `).join('')}
+        ${itinerary.unscheduled && itinerary.unscheduled.length > 0 ? `<p style="color: #888;"><small>Not scheduled: ${itinerary.unscheduled.join(', ')}</small></p>` : ''}
+    `;
+}
+
 // Display results
 function displayResults(plan, pdfUrl, usingSample = false) {
     const tripInfo = plan.trip_info;
@@ -111,7 +192,7 @@ function displayResults(plan, pdfUrl, usingSample = false) {
                                 <small>${flight.flight_number} • ${flight.duration}</small>
                             </div>
                             <div style="font-size: 1.2rem; font-weight: bold; color: #667eea;">
-                                ${flight.currency} ${flight.price}
+                                ${formatPrice(flight.price, flight.currency)}
                             </div>
                         </div>
                         <div style="margin-top: 10px; color: #666;">
@@ -124,12 +205,45 @@ function displayResults(plan, pdfUrl, usingSample = false) {
         `;
     }
     
+    let legsHTML = '';
+    if (plan.legs && plan.legs.length > 0) {
+        legsHTML = `
+            <div class="section">
+                <h3><i class="fas fa-route"></i> Itinerary</h3>
+                ${plan.legs.map((leg, index) => `
+                    <div class="flight-item">
+                        <strong>Leg ${index + 1}: ${leg.origin} (${leg.origin_code}) → ${leg.destination} (${leg.destination_code})</strong>
+                        <small style="color: #666;"> • ${formatDate(leg.departure_date)}</small>
+                        ${leg.flights.length > 0 ? leg.flights.slice(0, 3).map(flight => `
+                            <div style="display: flex; justify-content: space-between; margin-top: 8px; color: #555;">
+                                <small>${flight.airline} ${flight.flight_number} • ${flight.departure_time_display || flight.departure_time}</small>
+                                <small><strong>${formatPrice(flight.price, flight.currency)}</strong></small>
+                            </div>
+                        `).join('') : '<div style="margin-top: 8px; color: #888;"><small>No flights found</small></div>'}
+                    </div>
+                `).join('')}
+            </div>
+            ${(plan.stops || []).map(stop => `
+                <div class="section">
+                    <h3><i class="fas fa-map-marker-alt"></i> ${stop.city} (${stop.code})</h3>
+                    <p style="color: #666;"><small>${formatDate(stop.arrival_date)}${stop.departure_date ? ` - ${formatDate(stop.departure_date)}` : ''}</small></p>
+                    ${stop.weather && stop.weather.overview ? `<p><strong>Weather:</strong> ${stop.weather.overview.temperature}, ${stop.weather.overview.conditions}</p>` : ''}
+                    ${stop.hotels.length > 0 ? `<p><strong>Hotels:</strong> ${stop.hotels.slice(0, 3).map(hotel => hotel.name).join(', ')}</p>` : ''}
+                    ${stop.activities.length > 0 ? `<p><strong>Activities:</strong> ${stop.activities.slice(0, 3).map(activity => activity.name).join(', ')}</p>` : ''}
+                    ${renderItinerary(stop.itinerary)}
+                    ${stop.attractions.length > 0 ? `<p><strong>Attractions:</strong> ${stop.attractions.join(', ')}</p>` : ''}
+                </div>
+            `).join('')}
+        `;
+    }
+    
     const resultsHTML = `
  
 ${plan.weather && plan.weather.overview ? `
 <div class="section">
-    <h3><i class="fas fa-cloud-sun"></i> Weather Forecast for ${plan.weather.city || plan.trip_info.destination}</h3>
+    <h3><i class="fas fa-cloud-sun"></i> ${plan.weather.source === 'climatology' ? 'Typical Weather' : 'Weather Forecast'} for ${plan.weather.city || plan.trip_info.destination}</h3>
     ${plan.weather.is_sample ? '<p class="sample-note"><i class="fas fa-info-circle"></i> Sample weather data shown</p>' : ''}
+    ${plan.weather.source === 'climatology' ? '<p class="sample-note"><i class="fas fa-info-circle"></i> Beyond the forecast range: typical conditions from monthly averages</p>' : ''}
     
     <div class="weather-header" style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; margin-bottom: 15px;">
         <div>
@@ -191,7 +305,7 @@ ${plan.weather && plan.weather.overview ? `
                         ${day.icon}
                     </div>
                     <div style="font-weight: 600; color: #2c3e50; margin-bottom: 5px; font-size: 1rem;">
-                        ${day.date_display}
+                        ${day.date_display}${day.source === 'normals' ? ' <small style="color: #999;">(typical)</small>' : ''}
                     </div>
                     <div style="
                         font-size: 1.6rem;
@@ -297,6 +411,7 @@ ${plan.weather && plan.weather.overview ? `
             </div>
             
             ${flightsHTML}
+            ${legsHTML}
             
             ${plan.attractions && plan.attractions.length > 0 ? `
             <div class="section">
@@ -353,6 +468,13 @@ ${plan.weather && plan.weather.overview ? `
                 </div>
                 ` : ''}
 
+            ${plan.itinerary ? `
+            <div class="section">
+                <h3><i class="fas fa-route"></i> Day-by-Day Itinerary</h3>
+                ${renderItinerary(plan.itinerary)}
+            </div>
+            ` : ''}
+            
              ${plan.activities && plan.activities.length > 0 ? `
             <div class="section">
                 <h3><i class="fas fa-ticket-alt"></i> Tours & Activities</h3>
@@ -366,7 +488,7 @@ ${plan.weather && plan.weather.overview ? `
                                     <p style="color: #666; margin: 5px 0; font-size: 0.9rem; line-height: 1.4;">${activity.description}</p>
                                     <div style="display: flex; gap: 15px; font-size: 0.85rem; color: #555;">
                                         <span><i class="far fa-clock"></i> ${activity.duration}</span>
-                                        <span><i class="fas fa-tag"></i> ${activity.currency} ${activity.price}</span>
+                                        <span><i class="fas fa-tag"></i> ${formatPrice(activity.price, activity.currency)}</span>
                                     </div>
                                 </div>
                                 ${activity.booking_link && activity.booking_link !== '#' ? `
@@ -422,6 +544,7 @@ tripForm.addEventListener('submit', async function(e) {
         destination: document.getElementById('destination').value.trim(),
         departure_date: document.getElementById('departure_date').value,
         return_date: document.getElementById('return_date').value,
+        currency: document.getElementById('currency').value,
         interests: getSelectedInterests()
     };
     
@@ -433,7 +556,10 @@ tripForm.addEventListener('submit', async function(e) {
     try {
         const response = await fetch('/plan', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/vnd.tripplanner.compact+json, application/json;q=0.9'
+            },
             body: JSON.stringify(tripData)
         });
         
@@ -442,10 +568,12 @@ tripForm.addEventListener('submit', async function(e) {
         if (result.success) {
             if (result.using_sample) {
                 showToast('Using sample data. Add Amadeus API key for real flights.', 'warning');
+            } else if (result.plan.omitted_sections && result.plan.omitted_sections.length > 0) {
+                showToast(`High demand: ${result.plan.omitted_sections.join(', ')} left out of this plan.`, 'warning');
             } else {
                 showToast('✓ Trip plan created successfully!', 'success');
             }
-            displayResults(result.plan, result.pdf_url, result.using_sample);
+            displayResults(decodePlan(result.plan, result.encoding), result.pdf_url, result.using_sample);
         } else {
             throw new Error(result.error || 'Failed to create plan');
         }
@@ -0,0 +1,19 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never reach real upstreams or start background warm-up from tests
+os.environ['AMADEUS_API_KEY'] = ''
+os.environ['AMADEUS_API_SECRET'] = ''
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('WARMUP_ON_START', 'false')
+
+# Keep the plan database, PDFs and profiles out of the working tree
+_scratch = tempfile.mkdtemp(prefix='tripplanner-tests-')
+os.environ['PLAN_DB_PATH'] = os.path.join(_scratch, 'plans.db')
+os.environ['PDF_OUTPUT_DIR'] = os.path.join(_scratch, 'pdfs')
+os.environ['PROFILE_DIR'] = os.path.join(_scratch, 'profiles')
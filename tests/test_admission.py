@@ -0,0 +1,39 @@
+# tests/test_admission.py
+from datetime import date
+from admission import estimate_upstream_calls
+
+TODAY = date(2026, 10, 1)
+
+def single(departure_date):
+    return {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': departure_date}
+
+def test_single_city_counts_forecast_only_within_horizon():
+    # flights + hotels + activities, plus the forecast call when it is needed
+    assert estimate_upstream_calls(single('2026-10-05'), TODAY) == 4
+    assert estimate_upstream_calls(single('2027-03-01'), TODAY) == 3
+
+def test_multi_city_counts_distinct_legs_and_cities():
+    round_trip = {'legs': [
+        {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2026-10-05'},
+        {'origin': 'Paris', 'destination': 'Rome', 'departure_date': '2026-10-08'},
+        {'origin': 'Rome', 'destination': 'Berlin', 'departure_date': '2026-10-11'}
+    ]}
+    # 3 flight searches, hotels + activities for Paris and Rome, one forecast batch
+    assert estimate_upstream_calls(round_trip, TODAY) == 3 + 4 + 1
+
+    revisit = {'legs': [
+        {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2027-03-01'},
+        {'origin': 'Paris', 'destination': 'Rome', 'departure_date': '2027-03-04'},
+        {'origin': 'Rome', 'destination': 'paris', 'departure_date': '2027-03-07'}
+    ]}
+    # Paris twice shares its calls; all stays are beyond the horizon
+    assert estimate_upstream_calls(revisit, TODAY) == 3 + 4
+
+def test_cheaper_requests_get_lower_priority_values():
+    far_single = estimate_upstream_calls(single('2027-03-01'), TODAY)
+    near_single = estimate_upstream_calls(single('2026-10-05'), TODAY)
+    multi = estimate_upstream_calls({'legs': [
+        {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2026-10-05'},
+        {'origin': 'Paris', 'destination': 'Rome', 'departure_date': '2026-10-08'}
+    ]}, TODAY)
+    assert far_single < near_single < multi
@@ -0,0 +1,123 @@
+# tests/test_amadeus_client.py
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import deadline
+from amadeus_client import AmadeusClient
+from config import Config
+from deadline import DeadlineExceeded
+from trip_planner import TripPlanner
+
+class DripHandler(BaseHTTPRequestHandler):
+    """Sends a small body one byte every 50ms, well inside any socket read timeout"""
+
+    def do_GET(self):
+        if self.path.startswith('/v2/shopping/flight-offers'):
+            # An offer list that stays open until the last byte
+            body = b'{"data": [' + b' ' * 40 + b']}'
+        else:
+            body = b'{"ok": true}' + b' ' * 40
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            for byte in body:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def drip_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DripHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+def test_slow_body_is_bounded_by_the_request_deadline(drip_url):
+    client = AmadeusClient()
+    start = time.monotonic()
+    with deadline.scope(0.5), pytest.raises(DeadlineExceeded):
+        client._request('GET', drip_url, 10)
+    assert time.monotonic() - start < 1.0
+
+def test_slow_body_is_bounded_by_the_call_timeout(drip_url):
+    client = AmadeusClient()
+    start = time.monotonic()
+    with deadline.scope(30), pytest.raises(requests.Timeout):
+        client._request('GET', drip_url, 0.5)
+    assert time.monotonic() - start < 1.0
+    assert not deadline.expired()
+
+def test_body_is_read_when_in_time(drip_url):
+    response = AmadeusClient()._request('GET', drip_url, 10)
+    assert response.json() == {'ok': True}
+
+def test_streamed_body_is_bounded_by_the_call_timeout(drip_url):
+    response, chunks = AmadeusClient()._request('GET', drip_url, 0.5, stream_chunk_size=8)
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        b''.join(chunks)
+    assert time.monotonic() - start < 1.0
+    response.close()
+
+def test_flight_search_is_bounded_by_the_call_timeout(drip_url, monkeypatch):
+    monkeypatch.setattr(Config, 'HTTP_TIMEOUT', 0.5)
+    client = AmadeusClient()
+    client.base_url = drip_url.rstrip('/')
+    start = time.monotonic()
+    client.search_flights('Berlin', 'Paris', '2026-11-01')
+    assert time.monotonic() - start < 1.0
+
+def test_scope_never_extends_an_enclosing_deadline():
+    with deadline.scope(1):
+        with deadline.scope(60):
+            assert deadline.remaining() <= 1
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+def hourly_payload(start, end):
+    days = (end - start).days + 1
+    times = [f"{(start + timedelta(days=day)).isoformat()}T{hour:02d}:00" for day in range(days) for hour in range(24)]
+    return {'hourly_units': {'temperature_2m': '°C'}, 'hourly': {'time': times, 'temperature_2m': [12.0] * len(times)}}
+
+def test_forecast_straddling_the_horizon_is_filled_from_normals(monkeypatch):
+    client = AmadeusClient()
+    requested = []
+
+    def fake_request(method, url, default_timeout, params=None, **kwargs):
+        requested.append((params['start_date'], params['end_date']))
+        return FakeResponse(hourly_payload(date.fromisoformat(params['start_date']),
+                                           date.fromisoformat(params['end_date'])))
+
+    monkeypatch.setattr(client, '_request', fake_request)
+    today = date.today()
+    horizon = today + timedelta(days=Config.WEATHER_FORECAST_DAYS - 1)
+    start, end = horizon - timedelta(days=2), horizon + timedelta(days=3)
+
+    payload, = client.get_weather_forecasts([('Paris', start.isoformat(), end.isoformat())])
+    assert requested == [(start.isoformat(), horizon.isoformat())]
+    assert payload['_normals']['time'] == [(horizon + timedelta(days=day)).isoformat() for day in (1, 2, 3)]
+
+    weather = TripPlanner()._parse_weather_data(payload, start.isoformat(), end.isoformat(), 'Paris')
+    assert [day.date for day in weather.daily_forecast] == [
+        (start + timedelta(days=day)).isoformat() for day in range(5)]
+    assert [day.source for day in weather.daily_forecast] == [None, None, None, 'normals', 'normals']
+    assert weather.source == 'forecast'
@@ -0,0 +1,26 @@
+# tests/test_app.py
+import pytest
+import app as app_module
+from app import app, plan_store
+from models import TripInfo, TripPlan
+
+@pytest.fixture
+def client(monkeypatch):
+    def create_trip_plan(user_input, omit=()):
+        return TripPlan(trip_info=TripInfo(user_input['origin'], user_input['origin'][:3].upper(),
+                                           user_input['destination'], 'CDG', user_input['departure_date']),
+                        created_at='2026-10-19 11:06:20')
+    monkeypatch.setattr(app_module.planner, 'create_trip_plan', create_trip_plan)
+    return app.test_client()
+
+def plan(client, origin):
+    response = client.post('/plan', json={'origin': origin, 'destination': 'Paris', 'departure_date': '2026-11-01'})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_plans_to_the_same_destination_get_their_own_pdf(client):
+    berlin, rome = plan(client, 'Berlin'), plan(client, 'Rome')
+    assert berlin['pdf_url'] == f"/download/trip_plan_{berlin['plan_id']}.pdf"
+    assert berlin['pdf_url'] != rome['pdf_url']
+    assert plan_store.get_pdf_filename(berlin['plan_id']) != plan_store.get_pdf_filename(rome['plan_id'])
+    assert b'Berlin' not in client.get(f"/plan/{rome['plan_id']}").data
@@ -0,0 +1,29 @@
+# tests/test_currency.py
+import json
+import pytest
+from currency import RateTable, UnsupportedCurrency, convert_items, convert_plan
+
+@pytest.fixture
+def rates(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({'base': 'EUR', 'as_of': '2026-10-16', 'rates': {'USD': 1.25, 'GBP': 0.8}}))
+    return RateTable(path=str(path), refresh_interval=3600)
+
+def test_converts_known_currencies(rates):
+    items = [{'price': '100', 'currency': 'GBP'}, {'price': '10'}]
+    assert convert_items(items, 'USD', rates) == [
+        {'price': '156.25', 'currency': 'USD'},
+        {'price': '12.50', 'currency': 'USD'}
+    ]
+
+def test_unknown_source_currency_is_left_unconverted(rates):
+    plan = {'activities': [{'price': '50', 'currency': 'ISK'}, {'price': '20', 'currency': 'EUR'}],
+            'stops': [{'activities': [{'price': '7', 'currency': 'ISK'}]}]}
+    converted = convert_plan(plan, 'USD', rates)
+    assert converted['currency'] == 'USD'
+    assert converted['activities'] == [{'price': '50', 'currency': 'ISK'}, {'price': '25.00', 'currency': 'USD'}]
+    assert converted['stops'][0]['activities'] == [{'price': '7', 'currency': 'ISK'}]
+
+def test_unknown_target_currency_is_rejected(rates):
+    with pytest.raises(UnsupportedCurrency):
+        convert_plan({'activities': []}, 'ISK', rates)
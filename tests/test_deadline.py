@@ -0,0 +1,16 @@
+# tests/test_deadline.py
+import pytest
+import deadline
+from config import Config
+
+@pytest.mark.parametrize('value, expected', [('2500', 2.5), ('1e9', Config.PLAN_DEADLINE_MAX)])
+def test_budget_from_header(value, expected):
+    assert deadline.budget_from_header(value) == expected
+
+@pytest.mark.parametrize('value', [None, '', 'soon', '0', '-5', 'nan', 'NaN', 'inf', '-inf'])
+def test_unusable_budgets_fall_back_to_the_default(value):
+    assert deadline.budget_from_header(value) == Config.PLAN_DEADLINE
+
+def test_within_stops_at_its_own_deadline():
+    with pytest.raises(deadline.DeadlineExceeded):
+        list(deadline.within(iter([b'a', b'b']), until=0))
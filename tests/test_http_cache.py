@@ -0,0 +1,48 @@
+# tests/test_http_cache.py
+import gzip
+import pytest
+import http_cache
+from app import app, plan_store
+from config import Config
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def test_file_etag_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'FILE_ETAG_CACHE_SIZE', 3)
+    monkeypatch.setattr(http_cache, '_file_etags', http_cache.OrderedDict())
+    paths = []
+    for i in range(5):
+        path = tmp_path / f'plan_{i}.pdf'
+        path.write_bytes(b'%PDF ' + bytes([i]))
+        paths.append(str(path))
+        http_cache.file_etag(str(path))
+    assert list(http_cache._file_etags) == paths[2:]
+
+    # A hit refreshes the entry, so the oldest other file is evicted next
+    http_cache.file_etag(paths[2])
+    http_cache.file_etag(paths[0])
+    assert list(http_cache._file_etags) == [paths[3], paths[4], paths[2], paths[0]][-3:]
+
+def test_file_etag_changes_with_content(tmp_path):
+    path = tmp_path / 'plan.pdf'
+    path.write_bytes(b'one')
+    first = http_cache.file_etag(str(path))
+    path.write_bytes(b'other')
+    assert http_cache.file_etag(str(path)) != first
+
+def test_not_modified_repeats_coded_etag_and_cache_headers(client, monkeypatch):
+    monkeypatch.setattr(Config, 'RESPONSE_COMPRESSION_MIN_BYTES', 0)
+    plan_id = plan_store.save({'created_at': '2026-01-01 10:00:00', 'attractions': ['Louvre'] * 50})
+
+    first = client.get(f'/plan/{plan_id}', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(first.data)
+
+    second = client.get(f'/plan/{plan_id}', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Cache-Control'] == first.headers['Cache-Control']
+    assert second.headers['Vary'] == first.headers['Vary']
@@ -0,0 +1,90 @@
+# tests/test_json_stream.py
+import json
+import pytest
+import json_stream
+from json_stream import parse_object_stream
+
+PAYLOAD = {
+    'meta': {'count': 4, 'links': {'self': 'https://example.com/?a=1&b=2'}},
+    'data': [
+        {'id': 1, 'price': {'total': '123.45', 'base': 99.5}, 'score': -1.25e-3, 'big': 12345678901234567890},
+        {'id': 2, 'ok': True, 'missing': None, 'cancelled': False, 'tags': [], 'empty': {}},
+        {'id': 3, 'name': 'Zürich – Café “Crème” 😀', 'escaped': 'quote \\" backslash \\\\ \\u00e9 \\n'},
+        {'id': 4, 'nested': {'a': [{'b': [1, [2, [3, {'c': 'd'}]]]}], 'e': {'f': {'g': 0}}}}
+    ],
+    'dictionaries': {'carriers': {'LH': 'Lufthansa', 'AF': 'Air France'}}
+}
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+def encode(obj, **kwargs):
+    return json.dumps(obj, ensure_ascii=False, **kwargs).encode('utf-8')
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 16, 64, 4096])
+def test_matches_json_loads_for_any_chunk_size(size):
+    body = encode(PAYLOAD)
+    result, total = parse_object_stream(chunked(body, size), 'data')
+    assert result == json.loads(body)
+    assert total == 4
+
+def test_every_two_way_split():
+    # Cuts land inside numbers, literals, strings, escapes and multi-byte UTF-8 sequences
+    body = encode(PAYLOAD, indent=1)
+    expected = json.loads(body)
+    for cut in range(1, len(body)):
+        result, _ = parse_object_stream([body[:cut], body[cut:]], 'data')
+        assert result == expected, f"split at byte {cut}"
+
+def test_numbers_and_literals_split_at_chunk_edge():
+    body = b'{"data": [1.5, -20, 3e2, true, false, null, 12345]}'
+    for cut in range(1, len(body)):
+        result, total = parse_object_stream([body[:cut], body[cut:]], 'data')
+        assert result == {'data': [1.5, -20, 300.0, True, False, None, 12345]}
+        assert total == 7
+
+def test_multibyte_character_split_between_chunks():
+    body = encode({'data': ['€😀é']})
+    start = body.index('€'.encode('utf-8'))
+    for cut in range(start + 1, start + 9):
+        result, _ = parse_object_stream([body[:cut], body[cut:]], 'data')
+        assert result == {'data': ['€😀é']}
+
+def test_limit_keeps_first_items_and_counts_all():
+    body = encode(PAYLOAD)
+    result, total = parse_object_stream(chunked(body, 10), 'data', limit=2)
+    assert [item['id'] for item in result['data']] == [1, 2]
+    assert total == 4
+    # Keys after the array are still read
+    assert result['dictionaries'] == PAYLOAD['dictionaries']
+
+def test_limit_zero_and_empty_inputs():
+    result, total = parse_object_stream([encode(PAYLOAD)], 'data', limit=0)
+    assert result['data'] == [] and total == 4
+    assert parse_object_stream([b'{}'], 'data') == ({}, 0)
+    assert parse_object_stream([b' { "data" : [ ] } '], 'data') == ({'data': []}, 0)
+    # A non-array value under the key is kept as is
+    assert parse_object_stream([b'{"data": {"a": 1}}'], 'data') == ({'data': {'a': 1}}, 0)
+
+@pytest.mark.parametrize('body', [b'[1, 2]', b'{"data": [1 2]}', b'{"data": [1, 2]', b'{"data": [{"a": 1}', b'{"a": 1 "b": 2}'])
+def test_malformed_input_raises(body):
+    with pytest.raises(ValueError):
+        parse_object_stream(chunked(body, 3), 'data')
+
+def test_large_item_is_not_redecoded_per_chunk(monkeypatch):
+    calls = []
+    decoder = json.JSONDecoder()
+
+    class CountingDecoder:
+        def raw_decode(self, s, idx=0):
+            calls.append(idx)
+            return decoder.raw_decode(s, idx)
+
+    monkeypatch.setattr(json_stream, '_decoder', CountingDecoder())
+    item = {'description': 'x' * 200000, 'values': list(range(20000))}
+    body = encode({'data': [item, item]})
+    result, total = parse_object_stream(chunked(body, 64), 'data')
+
+    assert total == 2 and result['data'][1] == item
+    # ~5000 chunks; doubling the buffer needs only a few dozen attempts
+    assert len(calls) < 100
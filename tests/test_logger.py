@@ -0,0 +1,17 @@
+# tests/test_logger.py
+import logging
+import queue
+from logger import DroppingQueueHandler
+from metrics import LOG_RECORDS_DROPPED, REGISTRY
+
+def test_dropped_records_are_exported():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord('test', logging.WARNING, __file__, 1, 'message', None, None)
+    before = DroppingQueueHandler.dropped
+
+    for _ in range(3):
+        handler.enqueue(record)
+
+    assert DroppingQueueHandler.dropped == before + 2
+    assert LOG_RECORDS_DROPPED._values[('WARNING',)] >= 2
+    assert 'tripplanner_log_records_dropped_total{level="WARNING"}' in REGISTRY.render()
@@ -0,0 +1,227 @@
+# tests/test_models.py
+import json
+from datetime import date
+import pytest
+import models
+from config import Config
+from models import (Flight, Itinerary, ItineraryDay, TripInfo, TripPlan, ValidationError, Weather, dumps,
+                    parse_plan_request, to_dict)
+
+TODAY = date(2026, 10, 19)
+
+def single(**overrides):
+    body = {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2026-11-01', 'return_date': '2026-11-05'}
+    body.update(overrides)
+    return body
+
+def multi(*legs, **overrides):
+    body = {'legs': [{'origin': origin, 'destination': destination, 'departure_date': day}
+                     for origin, destination, day in legs]}
+    body.update(overrides)
+    return body
+
+def errors_for(data):
+    with pytest.raises(ValidationError) as info:
+        parse_plan_request(data, today=TODAY)
+    return info.value.errors
+
+################### parse_plan_request ###################
+
+def test_valid_single_city_request_is_normalized():
+    request = parse_plan_request(single(origin='  New   York ', destination='CDG', travelers='2',
+                                        interests=['Food', ' food', 'BEACH'], currency=' usd ', budget='high'),
+                                 today=TODAY)
+    assert (request.origin, request.destination) == ('New York', 'CDG')
+    assert request.travelers == 2
+    assert request.interests == ['food', 'beach']
+    assert request.currency == 'USD'
+    assert request.budget == 'high'
+    assert (request.departure_date, request.return_date) == ('2026-11-01', '2026-11-05')
+    assert request.legs is None
+
+def test_defaults():
+    request = parse_plan_request(single(return_date=None), today=TODAY)
+    assert (request.travelers, request.budget, request.interests, request.currency) == (1, 'medium', [], None)
+    assert request.return_date == ''
+
+def test_body_must_be_an_object():
+    assert errors_for(['not', 'a', 'dict']) == ["request body must be a JSON object"]
+
+@pytest.mark.parametrize('travelers', [True, False, 0, Config.MAX_TRAVELERS + 1, 2.5, 'two', '-1', '', None])
+def test_invalid_travelers(travelers):
+    assert errors_for(single(travelers=travelers)) == [
+        f"travelers: must be a whole number from 1 to {Config.MAX_TRAVELERS}"]
+
+@pytest.mark.parametrize('travelers, expected', [(3, 3), ('3', 3), (' 4 ', 4), (Config.MAX_TRAVELERS, Config.MAX_TRAVELERS)])
+def test_travelers_coercion(travelers, expected):
+    assert parse_plan_request(single(travelers=travelers), today=TODAY).travelers == expected
+
+def test_interests_must_be_a_list():
+    assert errors_for(single(interests='food')) == ["interests: must be a list"]
+
+def test_unknown_interests():
+    assert errors_for(single(interests=['food', 'skydiving', 7])) == [
+        "interests: unknown interest 'skydiving'", "interests: unknown interest 7"]
+
+def test_invalid_budget():
+    assert errors_for(single(budget='luxury')) == ["budget: must be one of low, medium, high"]
+
+def test_unsupported_currency():
+    assert errors_for(single(currency='xyz')) == ["currency: unsupported currency XYZ"]
+
+@pytest.mark.parametrize('field', ['origin', 'destination'])
+@pytest.mark.parametrize('value, message', [
+    (None, 'required'),
+    ('   ', 'required'),
+    (42, 'required'),
+    ('Paris 75', 'not a city name or 3-letter airport code'),
+    ('Berlin!', 'not a city name or 3-letter airport code'),
+    ('x' * (Config.MAX_PLACE_LENGTH + 1), 'not a city name or 3-letter airport code'),
+])
+def test_invalid_places(field, value, message):
+    assert f"{field}: {message}" in errors_for(single(**{field: value}))
+
+def test_same_origin_and_destination():
+    assert errors_for(single(destination='berlin')) == ["destination: same as origin"]
+
+@pytest.mark.parametrize('value, message', [
+    (None, 'required'),
+    ('', 'required'),
+    ('01/11/2026', 'must be a date (YYYY-MM-DD)'),
+    ('2026-11-1', 'must be a date (YYYY-MM-DD)'),
+    ('2026-13-01', 'must be a date (YYYY-MM-DD)'),
+    ('2026-W50-1', 'must be a date (YYYY-MM-DD)'),
+    ('2026-335', 'must be a date (YYYY-MM-DD)'),
+    ('20261101', 'must be a date (YYYY-MM-DD)'),
+    ('２０２６-11-01', 'must be a date (YYYY-MM-DD)'),
+    (20261101, 'must be a date (YYYY-MM-DD)'),
+    ('2026-10-18', 'cannot be in the past'),
+    ('2027-12-31', f'at most {Config.MAX_BOOKING_DAYS} days ahead'),
+])
+def test_invalid_departure_date(value, message):
+    assert f"departure_date: {message}" in errors_for(single(departure_date=value, return_date=None))
+
+def test_week_dates_are_rejected_in_legs():
+    assert errors_for(multi(('Berlin', 'Paris', '2026-W50-1'))) == [
+        "legs[0].departure_date: must be a date (YYYY-MM-DD)"]
+
+def test_invalid_return_dates():
+    assert errors_for(single(return_date='2026-11')) == ["return_date: must be a date (YYYY-MM-DD)"]
+    assert errors_for(single(return_date='2026-W45-4')) == ["return_date: must be a date (YYYY-MM-DD)"]
+    assert errors_for(single(return_date='2026-10-31')) == ["return_date: before departure_date"]
+    assert errors_for(single(return_date='2027-01-31')) == [
+        f"return_date: trips are limited to {Config.MAX_TRIP_DAYS} days"]
+
+def test_every_problem_is_reported_at_once():
+    errors = errors_for({'origin': '', 'departure_date': 'soon', 'travelers': 0, 'budget': 'x', 'interests': {}})
+    assert errors == [
+        f"travelers: must be a whole number from 1 to {Config.MAX_TRAVELERS}",
+        "interests: must be a list",
+        "budget: must be one of low, medium, high",
+        "origin: required",
+        "destination: required",
+        "departure_date: must be a date (YYYY-MM-DD)",
+    ]
+
+def test_valid_multi_city_request():
+    request = parse_plan_request(multi(('Berlin', 'Paris', '2026-11-01'), ('Paris', 'Rome', '2026-11-01'),
+                                       ('Rome', 'Berlin', '2026-11-06'), travelers='2'), today=TODAY)
+    assert [(leg.origin, leg.destination, leg.departure_date) for leg in request.legs] == [
+        ('Berlin', 'Paris', '2026-11-01'), ('Paris', 'Rome', '2026-11-01'), ('Rome', 'Berlin', '2026-11-06')]
+    assert request.travelers == 2
+    assert request.origin == ''
+
+@pytest.mark.parametrize('legs', [None, [], 'Berlin-Paris', {}])
+def test_legs_must_be_a_non_empty_list(legs):
+    assert errors_for({'legs': legs}) == ["legs: must be a non-empty list"]
+
+def test_too_many_legs():
+    legs = [('Berlin', 'Paris', '2026-11-01')] * (Config.MAX_TRIP_LEGS + 1)
+    assert errors_for(multi(*legs)) == [f"legs: at most {Config.MAX_TRIP_LEGS} legs"]
+
+def test_invalid_legs():
+    errors = errors_for({'legs': [
+        'Berlin',
+        {'origin': 'Berlin', 'destination': 'BERLIN', 'departure_date': '2026-11-01'},
+        {'origin': 'Berlin', 'destination': 'Rome'},
+        {'origin': 'Rome', 'destination': 'Madrid', 'departure_date': '2026-10-01'},
+    ]})
+    assert errors == [
+        "legs[0]: must be an object",
+        "legs[1]: origin and destination are the same",
+        "legs[2].departure_date: required",
+        "legs[3].departure_date: cannot be in the past",
+        "legs[3].departure_date: before the previous leg",
+    ]
+
+def test_legs_must_be_in_date_order():
+    errors = errors_for(multi(('Berlin', 'Paris', '2026-11-05'), ('Paris', 'Rome', '2026-11-03'),
+                              ('Rome', 'Madrid', '2026-11-04')))
+    assert errors == ["legs[1].departure_date: before the previous leg"]
+
+def test_leg_order_skips_legs_with_invalid_dates():
+    errors = errors_for(multi(('Berlin', 'Paris', '2026-11-05'), ('Paris', 'Rome', 'later'),
+                              ('Rome', 'Madrid', '2026-11-04')))
+    assert errors == ["legs[1].departure_date: must be a date (YYYY-MM-DD)",
+                      "legs[2].departure_date: before the previous leg"]
+
+################### to_dict / dumps ###################
+
+def sample_plan():
+    return TripPlan(
+        trip_info=TripInfo('Berlin', 'BER', 'Zürich', 'ZRH', '2026-11-01', interests=['food']),
+        flights=[Flight(airline='LX', price='99.00')],
+        weather=Weather('Zürich', {'avg_temp': 5.5}),
+        itinerary=Itinerary(days=[ItineraryDay(1, '2026-11-01')]),
+        packing_list={'essentials': ['Passport']},
+        created_at='2026-10-19 12:00:00'
+    )
+
+def test_to_dict_flattens_models_and_drops_none():
+    plan = to_dict(sample_plan())
+    assert plan['trip_info']['destination'] == 'Zürich'
+    assert plan['flights'][0]['airline'] == 'LX'
+    assert plan['flights'][0]['currency'] == Config.BASE_CURRENCY
+    assert 'departure_time_display' not in plan['flights'][0]
+    assert plan['itinerary']['days'] == [{'day': 1, 'date': '2026-11-01', 'stops': [], 'distance_km': 0.0}]
+    assert 'hotel' not in plan['itinerary']
+    assert 'legs' not in plan and 'stops' not in plan
+    assert list(plan)[:3] == ['trip_info', 'flights', 'hotels']
+
+def test_to_dict_passes_plain_values_through():
+    assert to_dict({'a': 1}) == {'a': 1}
+    assert to_dict([Flight(), 3]) == [to_dict(Flight()), 3]
+    assert to_dict('text') == 'text'
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        if models.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(models, 'orjson', None)
+    return request.param
+
+def test_dumps_matches_to_dict(encoder):
+    plan = sample_plan()
+    encoded = dumps(plan)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == to_dict(plan)
+
+def test_dumps_is_compact_and_keeps_unicode(encoder):
+    encoded = dumps({'city': 'Zürich', 'flights': [Flight(airline='LX')]})
+    assert b', ' not in encoded and b': ' not in encoded
+    assert 'Zürich'.encode('utf-8') in encoded
+    assert json.loads(encoded)['flights'][0]['airline'] == 'LX'
+
+def test_dumps_sort_keys(encoder):
+    assert dumps({'b': 1, 'a': {'d': 2, 'c': 3}}, sort_keys=True) == b'{"a":{"c":3,"d":2},"b":1}'
+    assert dumps({'b': 1, 'a': 2}) == b'{"b":1,"a":2}'
+
+def test_dumps_is_the_same_in_both_modes(monkeypatch):
+    if models.orjson is None:
+        pytest.skip('orjson not installed')
+    plan = sample_plan()
+    fast = dumps(plan, sort_keys=True)
+    monkeypatch.setattr(models, 'orjson', None)
+    assert json.loads(dumps(plan, sort_keys=True)) == json.loads(fast)
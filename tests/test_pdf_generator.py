@@ -0,0 +1,34 @@
+# tests/test_pdf_generator.py
+import os
+from config import Config
+from models import (Activity, Flight, Hotel, Itinerary, ItineraryDay, ItineraryStop, Leg, Stop, TripInfo, TripPlan,
+                    to_dict)
+from pdf_generator import generate_pdf
+
+# Upstream names that look like (broken) ReportLab paragraph markup
+HOSTILE_NAMES = ['Louvre <i>skip-the-line', 'Fish & Chips', 'Bar </para> <b>', '<font size="99">Big</font>']
+
+def render(trip_plan, name):
+    filename = generate_pdf(to_dict(trip_plan), filename=name)
+    assert os.path.getsize(os.path.join(Config.PDF_OUTPUT_DIR, filename)) > 0
+
+def test_itinerary_names_are_escaped():
+    itinerary = Itinerary(
+        hotel='Hotel <Paris> & Spa',
+        days=[ItineraryDay(1, '2026-11-01', stops=[ItineraryStop(name, 48.86, 2.34) for name in HOSTILE_NAMES])],
+        unscheduled=HOSTILE_NAMES
+    )
+    render(TripPlan(trip_info=TripInfo('Berlin', 'BER', 'Paris', 'CDG', '2026-11-01'), itinerary=itinerary),
+           'escaped_itinerary.pdf')
+
+def test_multi_city_names_are_escaped():
+    trip_plan = TripPlan(
+        trip_info=TripInfo('Berlin', 'BER', 'Paris', 'CDG', '2026-11-01'),
+        legs=[Leg('Berlin', 'BER', 'Paris <b>', 'CDG', '2026-11-01',
+                  flights=[Flight(airline='Air & <Sea>', price='99.00')])],
+        stops=[Stop('Paris <b>', 'CDG', '2026-11-01', '2026-11-04',
+                    hotels=[Hotel(name=name) for name in HOSTILE_NAMES],
+                    activities=[Activity(name=name) for name in HOSTILE_NAMES],
+                    attractions=HOSTILE_NAMES)]
+    )
+    render(trip_plan, 'escaped_multi_city.pdf')
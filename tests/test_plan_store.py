@@ -0,0 +1,59 @@
+# tests/test_plan_store.py
+import time
+from plan_store import PlanStore
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault('batch_size', 100)
+    kwargs.setdefault('flush_interval', 3600)
+    return PlanStore(db_path=str(tmp_path / 'plans.db'), **kwargs)
+
+def other_process_view(tmp_path, plan_id):
+    """What a separate store on the same database (e.g. another worker) sees"""
+    return make_store(tmp_path).get(plan_id)
+
+def test_background_flush_makes_plans_visible_to_other_stores(tmp_path):
+    store = make_store(tmp_path, flush_interval=0.05)
+    plan_id = store.save({'created_at': '2026-01-01 10:00:00', 'flights': []})
+    assert other_process_view(tmp_path, plan_id) is None
+
+    deadline = time.monotonic() + 2
+    while other_process_view(tmp_path, plan_id) is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert other_process_view(tmp_path, plan_id) == {'created_at': '2026-01-01 10:00:00', 'flights': []}
+    store.close()
+
+def test_close_flushes_pending_plans(tmp_path):
+    store = make_store(tmp_path)
+    plan_id = store.save({'created_at': '2026-01-01 10:00:00'})
+    store.close()
+    assert other_process_view(tmp_path, plan_id) == {'created_at': '2026-01-01 10:00:00'}
+
+def test_pending_plan_stays_readable_during_flush(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    plan_id = store.save({'created_at': '2026-01-01 10:00:00'})
+    seen = []
+
+    real_connect = store._connect
+    class SpyConnection:
+        def __init__(self, conn):
+            self.conn = conn
+        def __enter__(self):
+            return self.conn.__enter__()
+        def __exit__(self, *exc_info):
+            # Reads racing the flush, before the commit
+            seen.append(store.get(plan_id))
+            return self.conn.__exit__(*exc_info)
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    monkeypatch.setattr(store, '_connect', lambda: SpyConnection(real_connect()))
+    assert store.flush() == 1
+    assert seen == [{'created_at': '2026-01-01 10:00:00'}]
+    assert store._pending == {}
+
+def test_pdf_filename_update_survives_flush(tmp_path):
+    store = make_store(tmp_path)
+    plan_id = store.save({'created_at': '2026-01-01 10:00:00'}, pdf_filename='old.pdf')
+    store.set_pdf_filename(plan_id, 'new.pdf')
+    store.flush()
+    assert store.get_pdf_filename(plan_id) == 'new.pdf'
@@ -0,0 +1,67 @@
+# tests/test_rules.py
+import itertools
+import json
+import random
+import pytest
+from rules import DIMENSIONS, INTERESTS, RULES, RuleEngine, load_rules
+
+VOCABULARY = {
+    'interests': sorted(INTERESTS),
+    'destinations': ['paris', 'CDG', 'rome', 'sydney'],
+    'seasons': ['winter', 'spring', 'summer', 'autumn'],
+    'weather': ['cold', 'cool', 'mild', 'warm', 'hot', 'rain']
+}
+
+def naive_match(rules, kind, **context):
+    """Reference matcher: filter the rules one by one, then sort by priority"""
+    def restricted_ok(rule, dimension):
+        values = rule.get('when', {}).get(dimension)
+        if not values:
+            return True
+        wanted = {str(value).strip().lower() for value in context.get(dimension) or ()}
+        return any(str(value).strip().lower() in wanted for value in values)
+
+    ordered = sorted(enumerate(rules), key=lambda pair: (-pair[1].get('priority', 0), pair[0]))
+    return [rule for _, rule in ordered
+            if rule['kind'] == kind and all(restricted_ok(rule, dimension) for dimension in DIMENSIONS)]
+
+def random_rules(rng, count):
+    rules = []
+    for number in range(count):
+        when = {dimension: rng.sample(values, rng.randint(1, 2))
+                for dimension, values in VOCABULARY.items() if rng.random() < 0.4}
+        rules.append({'kind': rng.choice(['attraction', 'packing', 'weather']), 'when': when,
+                      'priority': rng.choice([0, 10, 20]), 'items': [f'item {number}']})
+    return rules
+
+def random_context(rng):
+    return {dimension: rng.sample(values, rng.randint(0, 3)) for dimension, values in VOCABULARY.items()}
+
+def test_engine_matches_naive_matcher_on_random_rules():
+    rng = random.Random(1234)
+    for _ in range(50):
+        rules = random_rules(rng, rng.randint(0, 80))
+        engine = RuleEngine(rules)
+        for _ in range(20):
+            context = random_context(rng)
+            for kind in ('attraction', 'packing', 'weather'):
+                assert engine.match(kind, **context) == naive_match(rules, kind, **context)
+
+def test_engine_matches_naive_matcher_on_shipped_rules():
+    for kind, interests, season in itertools.product(('attraction', 'packing'), [[], ['food'], ['beach', 'hiking']],
+                                                     [None, 'winter', 'summer']):
+        context = {'interests': interests, 'destinations': ['Paris', 'CDG'], 'seasons': [season] if season else ()}
+        assert RULES.match(kind, **context) == naive_match(RULES.rules, kind, **context)
+
+def test_context_values_are_normalized():
+    engine = RuleEngine([{'kind': 'attraction', 'when': {'interests': ['Food']}, 'items': ['x']}])
+    assert len(engine.match('attraction', interests=[' FOOD '])) == 1
+
+def test_shipped_rules_use_only_known_interests():
+    assert RULES.values('interests') <= INTERESTS
+
+def test_rules_keyed_on_unknown_interests_are_rejected(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'rules': [{'kind': 'attraction', 'when': {'interests': ['skydiving']}, 'items': ['x']}]}))
+    with pytest.raises(ValueError, match='skydiving'):
+        load_rules(str(path))
@@ -0,0 +1,26 @@
+# tests/test_tracing.py
+import pytest
+from app import app
+from metrics import TRACE_ID
+from profiling import RequestProfile
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+def test_safe_request_id_is_kept(client):
+    response = client.get('/healthz', headers={'X-Request-ID': 'checkout-42_A'})
+    assert response.headers['X-Request-ID'] == 'checkout-42_A'
+
+@pytest.mark.parametrize('request_id', ['../../etc/passwd', 'a b', 'id\x1b[31m', 'x' * 65, 'ümlaut'])
+def test_unsafe_request_id_is_replaced(client, request_id):
+    response = client.get('/healthz', headers={'X-Request-ID': request_id})
+    assert response.headers['X-Request-ID'] != request_id
+    assert TRACE_ID.fullmatch(response.headers['X-Request-ID'])
+
+def test_missing_request_id_is_generated(client):
+    assert TRACE_ID.fullmatch(client.get('/healthz').headers['X-Request-ID'])
+
+def test_profile_name_is_path_safe():
+    profile = RequestProfile('plan', '../../tmp/evil')
+    assert '/' not in profile.name and '..' not in profile.name
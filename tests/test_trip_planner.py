@@ -0,0 +1,96 @@
+# tests/test_trip_planner.py
+import pytest
+from trip_planner import TripPlanner
+
+def flight_offer(origin, destination, departure_date):
+    return {
+        'price': {'total': '120.00', 'currency': 'EUR'},
+        'itineraries': [{'duration': 'PT2H5M', 'segments': [{
+            'carrierCode': 'LH', 'number': '100',
+            'departure': {'iataCode': origin, 'at': f'{departure_date}T08:00:00'},
+            'arrival': {'iataCode': destination, 'at': f'{departure_date}T10:05:00'}
+        }]}]
+    }
+
+class FakeAmadeus:
+    """Upstream stand-in; flights between `failing` route pairs raise"""
+
+    def __init__(self, failing=(), activities=1):
+        self.failing = set(failing)
+        self.activities = activities
+
+    def get_airport_code(self, location):
+        return location[:3].upper()
+
+    def search_flights(self, origin, destination, departure_date, adults=1, return_date=None):
+        if (origin, destination) in self.failing:
+            raise RuntimeError('upstream exploded')
+        return {'data': [flight_offer(self.get_airport_code(origin), self.get_airport_code(destination), departure_date)]}
+
+    def search_hotels(self, city_code, radius=5, radius_unit='KM'):
+        return {'data': [{'name': f'Hotel {city_code}', 'hotelId': city_code, 'geoCode': {'latitude': 48.85, 'longitude': 2.35}}]}
+
+    def search_activities(self, location, radius=5):
+        return {'data': [{'name': f'Walk {number} in {location}',
+                          'geoCode': {'latitude': 48.86 + number / 100, 'longitude': 2.34}}
+                         for number in range(self.activities)]}
+
+    def get_weather_forecast(self, city_name, start_date, end_date):
+        return None
+
+    def get_weather_forecasts(self, locations):
+        return [None] * len(locations)
+
+LEGS = {'legs': [
+    {'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2026-11-01'},
+    {'origin': 'Paris', 'destination': 'Rome', 'departure_date': '2026-11-04'},
+    {'origin': 'Rome', 'destination': 'Berlin', 'departure_date': '2026-11-07'}
+]}
+
+@pytest.fixture
+def planner():
+    planner = TripPlanner()
+    planner.amadeus = FakeAmadeus()
+    return planner
+
+def test_multi_city_plan_builds_every_leg_and_stop(planner):
+    plan = planner.create_trip_plan(LEGS)
+    assert [len(leg.flights) for leg in plan.legs] == [1, 1, 1]
+    assert [stop.city for stop in plan.stops] == ['Paris', 'Rome']
+    assert all(stop.hotels and stop.itinerary for stop in plan.stops)
+    assert not any(section.startswith(('legs', 'stops')) for section in plan.fallback_sections)
+
+def test_failing_leg_is_isolated_and_reported(planner):
+    planner.amadeus.failing = {('Paris', 'Rome')}
+    plan = planner.create_trip_plan(LEGS)
+    assert [len(leg.flights) for leg in plan.legs] == [1, 0, 1]
+    assert 'legs[1]' in plan.fallback_sections
+    assert all(stop.hotels for stop in plan.stops)
+
+def test_failing_stop_gets_fallback_weather_and_is_reported(planner, monkeypatch):
+    parse_hotels = planner._parse_hotels
+    def broken_for_rome(hotels_data):
+        if hotels_data['data'][0]['hotelId'] == 'ROM':
+            raise ValueError('bad hotel payload')
+        return parse_hotels(hotels_data)
+    monkeypatch.setattr(planner, '_parse_hotels', broken_for_rome)
+
+    plan = planner.create_trip_plan(LEGS)
+    paris, rome = plan.stops
+    assert paris.hotels and paris.weather
+    assert rome.weather is not None and rome.weather.is_sample
+    assert 'stops[1]' in plan.fallback_sections
+    assert 'stops[0]' not in plan.fallback_sections
+    assert plan.packing_list
+
+def test_open_ended_trip_itinerary_spans_the_forecast_days(planner):
+    planner.amadeus.activities = 10
+    plan = planner.create_trip_plan({'origin': 'Berlin', 'destination': 'Paris', 'departure_date': '2026-11-01'})
+    assert [day.date for day in plan.itinerary.days] == [
+        '2026-11-01', '2026-11-02', '2026-11-03', '2026-11-04', '2026-11-05']
+    assert planner._weather_end_date('2026-11-01', '') == '2026-11-05'
+
+def test_last_stop_itinerary_spans_the_forecast_days(planner):
+    planner.amadeus.activities = 10
+    plan = planner.create_trip_plan({'legs': LEGS['legs'][:2]})
+    assert len(plan.stops[-1].itinerary.days) == 5
@@ -1,65 +1,312 @@
 # trip_planner.py
 from amadeus_client import AmadeusClient
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from config import Config
+from models import Activity, Flight, ForecastDay, Hotel, Leg, Stop, TripInfo, TripPlan, Weather
+from metrics import span, record_cache, SAMPLE_FALLBACKS
+from rules import RULES, merge_packing
+from itinerary import build_itinerary
+from deadline import DeadlineExceeded
+import contextvars
+import deadline
+import profiling
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Sections that may be left out of a plan (e.g. when shedding load)
+OPTIONAL_SECTIONS = {'activities'}
+
+class _UpstreamCalls:
+    """Run upstream lookups on a pool, sharing one future per distinct call
+
+    Results are awaited no longer than the request deadline allows; sections
+    still outstanding at the deadline are recorded in `omitted`, and calls
+    that raised in `failed` (under the `failure` key given to result()).
+    """
+
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='plan')
+        self.futures = {}
+        self.omitted = set()
+        self.failed = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Don't hold the response for calls abandoned at the deadline; their
+        # own timeouts are capped by the same budget
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, key, func, *args, **kwargs):
+        """Start a call unless an identical one is already in flight"""
+        future = self.futures.get(key)
+        record_cache('plan_upstream', future is not None)
+        if future is None:
+            # Each task gets its own copy so the trace ID and deadline follow it into the pool
+            context = contextvars.copy_context()
+            future = self.executor.submit(context.run, profiling.wrap(func), *args, **kwargs)
+            self.futures[key] = future
+        return future
+
+    def result(self, future, section, description=None, failure=None):
+        """Result of a call, or None if it failed or missed the deadline"""
+        try:
+            return future.result(timeout=deadline.remaining())
+        except (FutureTimeoutError, DeadlineExceeded):
+            logger.warning("Deadline reached before %s", description or section)
+            self.omitted.add(section)
+            return None
+        except Exception as e:
+            logger.error("Error fetching %s: %s", description or section, e)
+            if failure:
+                self.failed.add(failure)
+            return None
 
 class TripPlanner:
     def __init__(self):
         self.amadeus = AmadeusClient()
-        print("✅ TripPlanner initialized")
+        logger.debug("TripPlanner initialized")
     
-    def create_trip_plan(self, user_input):
-        """Create complete trip plan"""
-        print(f"📝 Creating trip plan...")
+    def create_trip_plan(self, user_input, omit=()):
+        """Create complete trip plan (a TripPlan), leaving out the sections in `omit`"""
+        if user_input.get('legs'):
+            return self.create_multi_city_plan(user_input, omit)
+        
+        logger.debug("Creating trip plan")
         
         # Get airport codes
         origin_code = self.amadeus.get_airport_code(user_input.get('origin', ''))
         destination_code = self.amadeus.get_airport_code(user_input.get('destination', ''))
         
-        trip_plan = {
-            'trip_info': {
-                'origin': user_input.get('origin', ''),
-                'origin_code': origin_code,
-                'destination': user_input.get('destination', ''),
-                'destination_code': destination_code,
-                'departure_date': user_input.get('departure_date', ''),
-                'return_date': user_input.get('return_date', ''),
-                'travelers': user_input.get('travelers', 1),
-                'budget': user_input.get('budget', 'medium'),
-                'interests': user_input.get('interests', [])
-            },
-            'flights': [],
-            'hotels': [], 
-            'attractions': [],
-            'activities': [],
-            'packing_list': {},
-            'weather': {},
-            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        try:
-            # Get flight data
-            flight_data = self.amadeus.search_flights(
+        trip_plan = TripPlan(
+            trip_info=TripInfo(
                 origin=user_input.get('origin', ''),
+                origin_code=origin_code,
                 destination=user_input.get('destination', ''),
+                destination_code=destination_code,
                 departure_date=user_input.get('departure_date', ''),
-                adults=user_input.get('travelers', 1),
-                return_date=user_input.get('return_date')
-            )
+                return_date=user_input.get('return_date', ''),
+                travelers=user_input.get('travelers', 1),
+                budget=user_input.get('budget', 'medium'),
+                interests=user_input.get('interests', [])
+            ),
+            omitted_sections=sorted(set(omit) & OPTIONAL_SECTIONS)
+        )
+        
+        try:
+            # Upstream sections are fetched concurrently, each within the request deadline
+            with _UpstreamCalls(Config.PLAN_MAX_WORKERS) as calls:
+                flights_future = calls.submit('flights', self._get_flights, user_input)
+                hotels_future = calls.submit('hotels', self._get_hotels, user_input)
+                activities_future = None if 'activities' in omit else calls.submit(
+                    'activities', self._get_activities, user_input)
+                weather_future = calls.submit('weather', self._get_weather, user_input)
+                
+                with span('attractions'):
+                    trip_plan.attractions = self._get_attractions(user_input)
+                
+                trip_plan.flights = calls.result(flights_future, 'flights') or []
+                trip_plan.hotels = calls.result(hotels_future, 'hotels') or []
+                if activities_future:
+                    trip_plan.activities = calls.result(activities_future, 'activities') or []
+                trip_plan.weather = calls.result(weather_future, 'weather')
+            
+            with span('itinerary'):
+                # Same span as the forecast, so open-ended trips get as many days as their weather
+                trip_info = trip_plan.trip_info
+                end_date = trip_info.departure_date and self._weather_end_date(trip_info.departure_date, trip_info.return_date)
+                trip_plan.itinerary = build_itinerary(trip_plan.hotels, trip_plan.activities,
+                                                      trip_info.departure_date, end_date)
             
-            trip_plan['flights'] = self._parse_flight_data(flight_data)
-            trip_plan['hotels'] = self._get_hotels(user_input)
-            trip_plan['activities'] = self._get_activities(user_input)
-            trip_plan['attractions'] = self._get_attractions(user_input)
-            trip_plan['packing_list'] = self._get_packing_list(user_input)
-            trip_plan['weather'] = self._get_weather(user_input) 
+            with span('packing_list'):
+                trip_plan.packing_list = self._get_packing_list(user_input, [trip_plan.weather])
             
-            print(f"✅ Trip plan created with {len(trip_plan['flights'])} flights")
+            self._record_degradation(trip_plan, calls.omitted)
+            logger.info("Trip plan created with %d flights", len(trip_plan.flights))
             return trip_plan
             
         except Exception as e:
-            print(f"❌ Error: {e}")
+            logger.exception("Error creating trip plan: %s", e)
             return trip_plan
     
+    def create_multi_city_plan(self, user_input, omit=()):
+        """Create a plan for a multi-leg trip (e.g. A→B→C→A or open-jaw)
+        
+        Every leg's flights and each stop's hotels and activities are fetched
+        concurrently; stops that share a city share the upstream calls, and the
+        weather for all stops comes from one batched forecast request.
+        """
+        legs = [Leg(
+            origin=leg.get('origin', ''),
+            origin_code=self.amadeus.get_airport_code(leg.get('origin', '')),
+            destination=leg.get('destination', ''),
+            destination_code=self.amadeus.get_airport_code(leg.get('destination', '')),
+            departure_date=leg.get('departure_date', '')
+        ) for leg in user_input['legs']]
+        stops = self._build_stops(legs)
+        travelers = user_input.get('travelers', 1)
+        interests = user_input.get('interests', [])
+        returns_home = legs[-1].destination_code == legs[0].origin_code
+        
+        logger.debug("Creating multi-city plan", extra={'fields': {'legs': len(legs), 'stops': len(stops)}})
+        
+        trip_plan = TripPlan(
+            trip_info=TripInfo(
+                trip_type='multi_city',
+                origin=legs[0].origin,
+                origin_code=legs[0].origin_code,
+                destination=', '.join(stop.city for stop in stops) or legs[-1].destination,
+                destination_code='-'.join(stop.code for stop in stops) or legs[-1].destination_code,
+                departure_date=legs[0].departure_date,
+                return_date=legs[-1].departure_date if returns_home else '',
+                travelers=travelers,
+                budget=user_input.get('budget', 'medium'),
+                interests=interests
+            ),
+            legs=legs,
+            stops=stops,
+            omitted_sections=sorted(set(omit) & OPTIONAL_SECTIONS)
+        )
+        
+        # Legs and stops that failed are reported in fallback_sections as legs[i]/stops[i]
+        failed = set()
+        calls = _UpstreamCalls(min(Config.PLAN_MAX_WORKERS, len(legs) + 3 * len(stops)))
+        try:
+            with calls:
+                flight_futures = [calls.submit(
+                    ('flights', leg.origin_code, leg.destination_code, leg.departure_date),
+                    self.amadeus.search_flights,
+                    origin=leg.origin,
+                    destination=leg.destination,
+                    departure_date=leg.departure_date,
+                    adults=travelers
+                ) for leg in legs]
+                
+                end_dates = [self._weather_end_date(stop.arrival_date, stop.departure_date) for stop in stops]
+                weather_future = calls.submit('weather', self.amadeus.get_weather_forecasts, [
+                    (stop.city, stop.arrival_date, end_date) for stop, end_date in zip(stops, end_dates)
+                ])
+                stop_futures = [(
+                    calls.submit(('hotels', stop.code), self.amadeus.search_hotels,
+                                 city_code=stop.code, radius=5, radius_unit='KM'),
+                    None if 'activities' in omit else
+                    calls.submit(('activities', stop.city.lower()), self.amadeus.search_activities, stop.city)
+                ) for stop in stops]
+                
+                # Local sections are built while the upstream calls are in flight
+                with span('attractions'):
+                    for stop in stops:
+                        stop.attractions = self._get_attractions({
+                            'destination': stop.city,
+                            'departure_date': stop.arrival_date,
+                            'interests': interests
+                        })
+                
+                for index, (leg, future) in enumerate(zip(legs, flight_futures)):
+                    try:
+                        flight_data = calls.result(future, 'flights', f"flights {leg.origin_code}-{leg.destination_code}",
+                                                   failure=f"legs[{index}]")
+                        with span('parse.flights'):
+                            leg.flights = self._parse_flight_data(flight_data)
+                    except Exception as e:
+                        logger.exception("Error planning leg %s-%s: %s", leg.origin_code, leg.destination_code, e)
+                        leg.flights = []
+                        failed.add(f"legs[{index}]")
+                
+                weather_batch = calls.result(weather_future, 'weather', f"weather for {len(stops)} stops")
+                if not isinstance(weather_batch, list) or len(weather_batch) != len(stops):
+                    weather_batch = [None] * len(stops)
+                
+                for index, (stop, futures, weather_data, end_date) in enumerate(zip(
+                        stops, stop_futures, weather_batch, end_dates)):
+                    try:
+                        self._fill_stop(calls, stop, futures, weather_data, end_date, f"stops[{index}]")
+                    except Exception as e:
+                        logger.exception("Error planning stop %s: %s", stop.city, e)
+                        stop.weather = stop.weather or self._get_sample_weather_fallback(stop.city)
+                        failed.add(f"stops[{index}]")
+            
+            with span('packing_list'):
+                trip_plan.packing_list = self._get_packing_list(
+                    {'interests': interests, 'departure_date': legs[0].departure_date},
+                    [stop.weather for stop in stops],
+                    destinations=self._destination_keys(*(stop.city for stop in stops))
+                )
+        except Exception as e:
+            logger.exception("Error creating multi-city plan: %s", e)
+        
+        self._record_degradation(trip_plan, calls.omitted, failed | calls.failed)
+        logger.info("Multi-city plan created with %d legs and %d stops", len(legs), len(stops),
+                    extra={'fields': {'upstream_calls': len(calls.futures)}})
+        return trip_plan
+    
+    def _fill_stop(self, calls, stop, futures, weather_data, end_date, failure):
+        """Hotels, activities, itinerary and weather for one stop"""
+        hotels_future, activities_future = futures
+        hotels_data = calls.result(hotels_future, 'hotels', f"hotels in {stop.city}", failure=failure)
+        activities_data = activities_future and calls.result(
+            activities_future, 'activities', f"activities in {stop.city}", failure=failure)
+        
+        if hotels_data and 'data' in hotels_data:
+            with span('parse.hotels'):
+                stop.hotels = self._parse_hotels(hotels_data)
+        if activities_data and 'data' in activities_data:
+            with span('parse.activities'):
+                stop.activities = self._parse_activities(activities_data)
+        with span('itinerary'):
+            stop.itinerary = build_itinerary(stop.hotels, stop.activities, stop.arrival_date, end_date)
+        if weather_data is not None or not deadline.expired():
+            with span('parse.weather'):
+                stop.weather = self._parse_weather_data(
+                    weather_data, stop.arrival_date, end_date, stop.city)
+    
+    def _record_degradation(self, trip_plan, omitted, failed=()):
+        """Note sections cut by the deadline and sections served from sample data or left empty by errors"""
+        trip_plan.omitted_sections = sorted(set(trip_plan.omitted_sections) | omitted)
+        
+        parts = [trip_plan] + (trip_plan.legs or []) + (trip_plan.stops or [])
+        fallback = set()
+        for part in parts:
+            for section in ('flights', 'hotels', 'activities'):
+                if any(item.is_sample for item in getattr(part, section, ())):
+                    fallback.add(section)
+            weather = getattr(part, 'weather', None)
+            if weather and weather.is_sample:
+                fallback.add('weather')
+        trip_plan.fallback_sections = sorted(fallback | set(failed))
+    
+    def _build_stops(self, legs):
+        """Cities stayed in between legs (the final return home is not a stop)"""
+        stops = []
+        for i, leg in enumerate(legs):
+            next_leg = legs[i + 1] if i + 1 < len(legs) else None
+            if next_leg is None and leg.destination_code == legs[0].origin_code:
+                break
+            
+            stops.append(Stop(
+                city=leg.destination,
+                code=leg.destination_code,
+                arrival_date=leg.departure_date,
+                departure_date=next_leg.departure_date if next_leg else ''
+            ))
+        return stops
+    
+    def _get_flights(self, user_input):
+        """Get flight offers for the trip"""
+        flight_data = self.amadeus.search_flights(
+            origin=user_input.get('origin', ''),
+            destination=user_input.get('destination', ''),
+            departure_date=user_input.get('departure_date', ''),
+            adults=user_input.get('travelers', 1),
+            return_date=user_input.get('return_date')
+        )
+        
+        with span('parse.flights'):
+            return self._parse_flight_data(flight_data)
+    
     def _parse_flight_data(self, flight_data):
         """Parse flight data from API response"""
         flights = []
@@ -69,25 +316,17 @@ class TripPlanner:
         
         is_sample = flight_data.get('_is_sample', False)
         
-        for flight in flight_data.get('data', [])[:20]:
+        for flight in flight_data.get('data', [])[:Config.FLIGHT_RESULTS_LIMIT]:
             try:
-                flight_info = {
-                    'airline': 'Unknown',
-                    'flight_number': '',
-                    'price': flight.get('price', {}).get('total', 'N/A'),
-                    'currency': flight.get('price', {}).get('currency', 'USD'),
-                    'departure_time': 'N/A',
-                    'arrival_time': 'N/A',
-                    'departure_airport': 'N/A',
-                    'arrival_airport': 'N/A',
-                    'duration': 'N/A',
-                    'stops': 0,
-                    'is_sample': is_sample
-                }
+                flight_info = Flight(
+                    price=flight.get('price', {}).get('total', 'N/A'),
+                    currency=flight.get('price', {}).get('currency', Config.BASE_CURRENCY),
+                    is_sample=is_sample
+                )
                 
                 if flight.get('itineraries'):
                     itinerary = flight['itineraries'][0]
-                    flight_info['duration'] = itinerary.get('duration', 'PT0H').replace('PT', '').replace('H', 'h ').replace('M', 'm')
+                    flight_info.duration = itinerary.get('duration', 'PT0H').replace('PT', '').replace('H', 'h ').replace('M', 'm')
                     
                     if itinerary.get('segments'):
                         segment = itinerary['segments'][0]
@@ -99,24 +338,23 @@ class TripPlanner:
                         else:
                             airline_name = carrier_code
                         
-                        flight_info.update({
-                            'airline': airline_name,
-                            'flight_number': f"{carrier_code}{segment.get('number', '')}",
-                            'departure_time': segment.get('departure', {}).get('at', 'N/A'),
-                            'arrival_time': segment.get('arrival', {}).get('at', 'N/A'),
-                            'departure_airport': segment.get('departure', {}).get('iataCode', 'N/A'),
-                            'arrival_airport': segment.get('arrival', {}).get('iataCode', 'N/A'),
-                            'stops': len(itinerary['segments']) - 1
-                        })
+                        flight_info.airline = airline_name
+                        flight_info.flight_number = f"{carrier_code}{segment.get('number', '')}"
+                        flight_info.departure_time = segment.get('departure', {}).get('at', 'N/A')
+                        flight_info.arrival_time = segment.get('arrival', {}).get('at', 'N/A')
+                        flight_info.departure_airport = segment.get('departure', {}).get('iataCode', 'N/A')
+                        flight_info.arrival_airport = segment.get('arrival', {}).get('iataCode', 'N/A')
+                        flight_info.stops = len(itinerary['segments']) - 1
                 
                 # Format times
                 for time_key in ['departure_time', 'arrival_time']:
-                    if flight_info[time_key] != 'N/A':
+                    value = getattr(flight_info, time_key)
+                    if value != 'N/A':
                         try:
-                            dt = datetime.fromisoformat(flight_info[time_key].replace('Z', '+00:00'))
-                            flight_info[f'{time_key}_display'] = dt.strftime('%b %d, %I:%M %p')
+                            dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                            setattr(flight_info, f'{time_key}_display', dt.strftime('%b %d, %I:%M %p'))
                         except:
-                            flight_info[f'{time_key}_display'] = flight_info[time_key]
+                            setattr(flight_info, f'{time_key}_display', value)
                 
                 flights.append(flight_info)
                 
@@ -132,57 +370,64 @@ class TripPlanner:
         
         activities = []
         if activities_data and 'data' in activities_data:
-            is_sample = activities_data.get('_is_sample', False)
+            with span('parse.activities'):
+                activities = self._parse_activities(activities_data)
+        
+        return activities
+    
+    def _parse_activities(self, activities_data):
+        """Parse activities from API response"""
+        activities = []
+        is_sample = activities_data.get('_is_sample', False)
+        
+        for activity in activities_data.get('data', [])[:10]:  # Limit to 10 activities
+            description = activity.get('shortDescription', activity.get('description', 'No description available'))
             
-            for activity in activities_data.get('data', [])[:10]:  # Limit to 10 activities
-                activity_info = {
-                    'name': activity.get('name', 'Activity'),
-                    'description': activity.get('shortDescription', activity.get('description', 'No description available')),
-                    'price': activity.get('price', {}).get('amount', 'N/A'),
-                    'currency': activity.get('price', {}).get('currencyCode', 'EUR'),
-                    'duration': activity.get('minimumDuration', 'Not specified'),
-                    'booking_link': activity.get('bookingLink', '#'),
-                    'is_sample': is_sample
-                }
-                
-                # Clean up HTML from description
-                if '<' in activity_info['description']:
-                    import re
-                    activity_info['description'] = re.sub('<[^<]+?>', '', activity_info['description'])
-                
-                # Truncate long descriptions
-                if len(activity_info['description']) > 150:
-                    activity_info['description'] = activity_info['description'][:147] + '...'
-                
-                activities.append(activity_info)
+            # Clean up HTML from description
+            if '<' in description:
+                import re
+                description = re.sub('<[^<]+?>', '', description)
+            
+            # Truncate long descriptions
+            if len(description) > 150:
+                description = description[:147] + '...'
+            
+            activities.append(Activity(
+                name=activity.get('name', 'Activity'),
+                description=description,
+                price=activity.get('price', {}).get('amount', 'N/A'),
+                currency=activity.get('price', {}).get('currencyCode', 'EUR'),
+                duration=activity.get('minimumDuration', 'Not specified'),
+                booking_link=activity.get('bookingLink', '#'),
+                location={
+                    'latitude': activity.get('geoCode', {}).get('latitude', 0),
+                    'longitude': activity.get('geoCode', {}).get('longitude', 0)
+                },
+                is_sample=is_sample
+            ))
         
         return activities
     
     def _get_attractions(self, user_input):
-        """Generate attractions list"""
+        """Generate attractions list from the rules for the destination, interests and season"""
         destination = user_input.get('destination', 'Unknown')
-        interests = user_input.get('interests', [])
-        
-        attractions = [
-            f"Explore {destination} city center",
-            f"Visit local markets in {destination}",
-            "Try traditional cuisine",
-            "Take a city tour"
-        ]
-        
-        interest_map = {
-            'beach': ['Relax at the beach', 'Try water sports', 'Watch sunset'],
-            'hiking': ['Hike mountain trails', 'Visit nature reserves'],
-            'culture': ['Visit museums', 'Explore historical sites'],
-            'food': ['Food tasting tour', 'Cooking class'],
-            'shopping': ['Shop at boutiques', 'Visit shopping malls']
-        }
-        
-        for interest in interests:
-            if interest in interest_map:
-                attractions.extend(interest_map[interest])
-        
-        return list(set(attractions))[:8]
+        destinations = self._destination_keys(destination)
+        
+        return RULES.attractions(
+            destination,
+            destinations,
+            user_input.get('interests', []),
+            RULES.season(user_input.get('departure_date'), destinations),
+            Config.ATTRACTIONS_LIMIT
+        )
+    
+    def _destination_keys(self, *destinations):
+        """City names and airport codes rules can be keyed on"""
+        keys = []
+        for destination in destinations:
+            if destination:
+                keys.extend([destination, self.amadeus.get_airport_code(destination)])
+        return keys
     
     def _get_hotels(self, user_input):
         """Get hotel information for destination"""
@@ -197,72 +442,75 @@ class TripPlanner:
         
         hotels = []
         if hotels_data and 'data' in hotels_data:
-            is_sample = hotels_data.get('_is_sample', False)
-            
-            for hotel in hotels_data.get('data', [])[:10]:  # Limit to 10 hotels
-                hotel_info = {
-                    'name': hotel.get('name', 'Hotel'),
-                    'hotel_id': hotel.get('hotelId', ''),
-                    'chain': hotel.get('chainCode', ''),
-                    'address': hotel.get('address', {}),
-                    'location': {
-                        'latitude': hotel.get('geoCode', {}).get('latitude', 0),
-                        'longitude': hotel.get('geoCode', {}).get('longitude', 0)
-                    },
-                    'distance': hotel.get('distance', {}),
-                    'is_sample': is_sample
-                }
-                
-                # Format address
-                address_lines = []
-                address_data = hotel_info['address']
-                
-                if 'lines' in address_data:
-                    address_lines.extend(address_data['lines'][:2])
-                
-                city_info = []
-                if address_data.get('cityName'):
-                    city_info.append(address_data['cityName'])
-                if address_data.get('stateCode'):
-                    city_info.append(address_data['stateCode'])
-                if address_data.get('countryCode'):
-                    city_info.append(address_data['countryCode'])
-                
-                if city_info:
-                    address_lines.append(', '.join(city_info))
-                
-                hotel_info['formatted_address'] = '\n'.join(address_lines) if address_lines else 'Address not available'
-                
-                # Format distance
-                distance_data = hotel_info['distance']
-                if distance_data and 'value' in distance_data and 'unit' in distance_data:
-                    hotel_info['formatted_distance'] = f"{distance_data['value']} {distance_data['unit']} from center"
-                else:
-                    hotel_info['formatted_distance'] = ''
-                
-                hotels.append(hotel_info)
+            with span('parse.hotels'):
+                hotels = self._parse_hotels(hotels_data)
         
         return hotels
+    
+    def _parse_hotels(self, hotels_data):
+        """Parse hotels from API response"""
+        hotels = []
+        is_sample = hotels_data.get('_is_sample', False)
+        
+        for hotel in hotels_data.get('data', [])[:10]:  # Limit to 10 hotels
+            hotel_info = Hotel(
+                name=hotel.get('name', 'Hotel'),
+                hotel_id=hotel.get('hotelId', ''),
+                chain=hotel.get('chainCode', ''),
+                address=hotel.get('address', {}),
+                location={
+                    'latitude': hotel.get('geoCode', {}).get('latitude', 0),
+                    'longitude': hotel.get('geoCode', {}).get('longitude', 0)
+                },
+                distance=hotel.get('distance', {}),
+                is_sample=is_sample
+            )
+            
+            # Format address
+            address_lines = []
+            address_data = hotel_info.address
+            
+            if 'lines' in address_data:
+                address_lines.extend(address_data['lines'][:2])
+            
+            city_info = []
+            if address_data.get('cityName'):
+                city_info.append(address_data['cityName'])
+            if address_data.get('stateCode'):
+                city_info.append(address_data['stateCode'])
+            if address_data.get('countryCode'):
+                city_info.append(address_data['countryCode'])
+            
+            if city_info:
+                address_lines.append(', '.join(city_info))
+            
+            if address_lines:
+                hotel_info.formatted_address = '\n'.join(address_lines)
+            
+            # Format distance
+            distance_data = hotel_info.distance
+            if distance_data and 'value' in distance_data and 'unit' in distance_data:
+                hotel_info.formatted_distance = f"{distance_data['value']} {distance_data['unit']} from center"
+            
+            hotels.append(hotel_info)
         
-    def _get_packing_list(self, user_input):
-        """Generate packing list"""
-        packing_list = {
-            'essentials': ['Passport/ID', 'Wallet', 'Phone + Charger', 'Travel documents'],
-            'clothing': ['T-shirts', 'Pants', 'Underwear', 'Socks', 'Jacket', 'Comfortable shoes'],
-            'toiletries': ['Toothbrush', 'Shampoo', 'Soap', 'Deodorant', 'Sunscreen'],
-            'electronics': ['Phone charger', 'Power bank', 'Headphones']
-        }
+        return hotels
         
-        interests = user_input.get('interests', [])
-        special_items = []
+    def _get_packing_list(self, user_input, weather_sections=(), destinations=None):
+        """Generate packing list from the rules, merged with the forecast's recommendations"""
+        if destinations is None:
+            destinations = self._destination_keys(user_input.get('destination', ''))
         
-        if 'beach' in interests:
-            special_items.extend(['Swimsuit', 'Sunglasses', 'Beach towel'])
-        if 'hiking' in interests:
-            special_items.extend(['Hiking boots', 'Backpack', 'Water bottle'])
+        packing_list = RULES.packing_list(
+            destinations,
+            user_input.get('interests', []),
+            RULES.season(user_input.get('departure_date'), destinations)
+        )
         
-        if special_items:
-            packing_list['special'] = special_items
+        # Reuse the recommendations already computed with each forecast
+        for weather in weather_sections:
+            if weather and not weather.is_sample:
+                merge_packing(packing_list, weather.packing_recommendations)
         
         return packing_list
     
@@ -277,14 +525,7 @@ class TripPlanner:
         if not departure_date:
             return self._get_sample_weather_fallback()
         
-        # Calculate date range (5 days forecast if no return date)
-        if return_date:
-            end_date = return_date
-        else:
-            # Add 4 days to departure for a 5-day forecast
-            from datetime import datetime, timedelta
-            dep_date = datetime.strptime(departure_date, '%Y-%m-%d')
-            end_date = (dep_date + timedelta(days=4)).strftime('%Y-%m-%d')
+        end_date = self._weather_end_date(departure_date, return_date)
         
         # Get weather data
         weather_data = self.amadeus.get_weather_forecast(
@@ -294,10 +535,23 @@ class TripPlanner:
         )
         
         # Parse weather data
-        return self._parse_weather_data(weather_data, departure_date, end_date,destination)
+        with span('parse.weather'):
+            return self._parse_weather_data(weather_data, departure_date, end_date,destination)
+        
+    def _weather_end_date(self, departure_date, return_date):
+        """End of the stay for the forecast and itinerary (5 days if no return date)"""
+        if return_date:
+            return return_date
+        
+        # Add 4 days to departure for a 5-day forecast
+        dep_date = datetime.strptime(departure_date, '%Y-%m-%d')
+        return (dep_date + timedelta(days=4)).strftime('%Y-%m-%d')
         
     def _parse_weather_data(self, weather_data, start_date, end_date, city_name):
         """Parse weather data from API response"""
+        if weather_data and weather_data.get('_climatology'):
+            return self._parse_climate_normals(weather_data, start_date, end_date, city_name)
+        
         if not weather_data or 'hourly' not in weather_data:
             return self._get_sample_weather_fallback(city_name)
         
@@ -340,25 +594,69 @@ class TripPlanner:
                 # Determine weather condition based on temperature
                 condition = self._get_weather_condition(avg_temp, data['temps'])
                 
-                forecast_days.append({
-                    'date': date,
-                    'date_display': datetime.strptime(date, '%Y-%m-%d').strftime('%b %d'),
-                    'avg_temp': round(avg_temp, 1),
-                    'min_temp': round(min_temp, 1),
-                    'max_temp': round(max_temp, 1),
-                    'condition': condition,
-                    'icon': self._get_weather_icon(condition)
-                })
-        
+                forecast_days.append(ForecastDay(
+                    date=date,
+                    date_display=datetime.strptime(date, '%Y-%m-%d').strftime('%b %d'),
+                    avg_temp=round(avg_temp, 1),
+                    min_temp=round(min_temp, 1),
+                    max_temp=round(max_temp, 1),
+                    condition=condition,
+                    icon=self._get_weather_icon(condition)
+                ))
+        
+        # Days past the forecast horizon
+        if weather_data.get('_normals'):
+            forecast_days.extend(self._normal_days(weather_data['_normals']))
+        
+        return self._summarize_weather(
+            forecast_days, start_date, end_date, city_name,
+            is_sample=is_sample,
+            unit=weather_data.get('hourly_units', {}).get('temperature_2m', '°C'),
+            source='sample' if is_sample else 'forecast'
+        )
+    
+    def _parse_climate_normals(self, weather_data, start_date, end_date, city_name):
+        """Typical days from the monthly normals for dates beyond the forecast"""
+        return self._summarize_weather(
+            self._normal_days(weather_data['daily']), start_date, end_date, city_name,
+            unit=weather_data.get('daily_units', {}).get('temperature_2m_max', '°C'),
+            source='climatology'
+        )
+    
+    def _normal_days(self, daily):
+        """ForecastDays from a daily payload of climate normals"""
+        forecast_days = []
+        for date, low, high, rain in zip(daily['time'], daily['temperature_2m_min'],
+                                         daily['temperature_2m_max'], daily['rain_probability']):
+            avg_temp = (low + high) / 2
+            if rain >= Config.RAINY_DAY_PROBABILITY:
+                condition = 'Rainy'
+            else:
+                condition = self._get_weather_condition(avg_temp, [low, high])
+            
+            forecast_days.append(ForecastDay(
+                date=date,
+                date_display=datetime.strptime(date, '%Y-%m-%d').strftime('%b %d'),
+                avg_temp=round(avg_temp, 1),
+                min_temp=low,
+                max_temp=high,
+                condition=condition,
+                icon=self._get_weather_icon(condition),
+                source='normals'
+            ))
+        return forecast_days
+    
+    def _summarize_weather(self, forecast_days, start_date, end_date, city_name, is_sample=False, unit='°C', source='forecast'):
+        """Weather section (overview, first days, packing advice) from daily figures"""
         # Get overall forecast
         overall_temp = None
         if forecast_days:
-            avg_temps = [day['avg_temp'] for day in forecast_days]
+            avg_temps = [day.avg_temp for day in forecast_days]
             overall_temp = round(sum(avg_temps) / len(avg_temps), 1)
         
         # Determine overall condition
         if forecast_days:
-            conditions = [day['condition'] for day in forecast_days]
+            conditions = [day.condition for day in forecast_days]
             overall_condition = max(set(conditions), key=conditions.count)
         else:
             overall_condition = 'Sunny'
@@ -369,19 +667,20 @@ class TripPlanner:
         # Format city name nicely
         formatted_city_name = city_name.title()
         
-        return {
-            'is_sample': is_sample,
-            'city': formatted_city_name,
-            'overview': {
+        return Weather(
+            is_sample=is_sample,
+            city=formatted_city_name,
+            overview={
                 'temperature': f"{overall_temp}°C" if overall_temp else 'N/A',
                 'conditions': overall_condition,
                 'recommendation': packing_recommendations.get('recommendation', ''),
                 'date_range': f"{start_date} to {end_date}"
             },
-            'daily_forecast': forecast_days[:5],  # Limit to 5 days
-            'packing_recommendations': packing_recommendations.get('items', []),
-            'unit': weather_data.get('hourly_units', {}).get('temperature_2m', '°C')
-        }
+            daily_forecast=forecast_days[:5],  # Limit to 5 days
+            packing_recommendations=packing_recommendations.get('items', []),
+            unit=unit,
+            source=source
+        )
             
     def _get_weather_condition(self, avg_temp, hourly_temps):
         """Determine weather condition based on temperature data"""
@@ -422,59 +721,52 @@ class TripPlanner:
                 'items': []
             }
         
-        # Analyze temperatures
+        return RULES.weather_packing(self._get_weather_tags(forecast_days))
+    
+    def _get_weather_tags(self, forecast_days):
+        """Temperature band (and rain) of a forecast, as used by the weather rules"""
         all_temps = []
         for day in forecast_days:
-            all_temps.extend([day['min_temp'], day['max_temp']])
+            all_temps.extend([day.min_temp, day.max_temp])
         
-        avg_temp = sum(all_temps) / len(all_temps)
         min_temp = min(all_temps)
         max_temp = max(all_temps)
         
-        recommendations = []
-        recommendation_text = ""
-        
+        tags = []
         if max_temp > 25:
-            recommendations.extend(['Sunscreen', 'Sunglasses', 'Hat', 'Light clothing'])
-            recommendation_text = "Hot weather expected. Stay hydrated!"
+            tags.append('hot')
         elif max_temp > 15:
-            recommendations.extend(['Light jacket', 'T-shirts', 'Comfortable shoes'])
-            recommendation_text = "Pleasant weather. Perfect for exploring!"
+            tags.append('warm')
         elif max_temp > 5:
-            recommendations.extend(['Warm jacket', 'Sweaters', 'Long pants'])
-            recommendation_text = "Cool weather. Layer your clothing."
+            tags.append('cool')
         elif min_temp < 0:
-            recommendations.extend(['Winter coat', 'Gloves', 'Scarf', 'Warm hat', 'Thermal layers'])
-            recommendation_text = "Cold weather. Bundle up and stay warm!"
+            tags.append('cold')
         
-        # Add rain gear if any day has rainy condition
-        if any('rain' in day['condition'].lower() for day in forecast_days):
-            recommendations.extend(['Umbrella', 'Waterproof jacket', 'Waterproof shoes'])
-            recommendation_text += " Rain expected. Bring rain gear."
+        if any('rain' in day.condition.lower() for day in forecast_days):
+            tags.append('rain')
         
-        return {
-            'recommendation': recommendation_text,
-            'items': list(set(recommendations))  # Remove duplicates
-        }
+        return tags
         
     def _get_sample_weather_fallback(self, city_name="Unknown"):
         """Fallback sample weather data"""
+        SAMPLE_FALLBACKS.inc('weather')
         formatted_city_name = city_name.title() if city_name != "Unknown" else "Your destination"
         
-        return {
-            'is_sample': True,
-            'city': formatted_city_name,
-            'overview': {
+        return Weather(
+            is_sample=True,
+            city=formatted_city_name,
+            overview={
                 'temperature': '75°F (24°C)',
                 'conditions': 'Sunny with clear skies',
                 'recommendation': 'Perfect for outdoor activities!',
                 'date_range': 'Sample dates'
             },
-            'daily_forecast': [
-                {'date': '2024-01-15', 'date_display': 'Jan 15', 'avg_temp': 22, 'min_temp': 18, 'max_temp': 26, 'condition': 'Sunny', 'icon': '☀️'},
-                {'date': '2024-01-16', 'date_display': 'Jan 16', 'avg_temp': 23, 'min_temp': 19, 'max_temp': 27, 'condition': 'Partly Cloudy', 'icon': '⛅'},
-                {'date': '2024-01-17', 'date_display': 'Jan 17', 'avg_temp': 21, 'min_temp': 17, 'max_temp': 25, 'condition': 'Sunny', 'icon': '☀️'}
+            daily_forecast=[
+                ForecastDay('2024-01-15', 'Jan 15', 22, 18, 26, 'Sunny', '☀️'),
+                ForecastDay('2024-01-16', 'Jan 16', 23, 19, 27, 'Partly Cloudy', '⛅'),
+                ForecastDay('2024-01-17', 'Jan 17', 21, 17, 25, 'Sunny', '☀️')
             ],
-            'packing_recommendations': ['Sunscreen', 'Sunglasses', 'Light jacket'],
-            'unit': '°C'
-        }
\ No newline at end of file
+            packing_recommendations=['Sunscreen', 'Sunglasses', 'Light jacket'],
+            unit='°C',
+            source='sample'
+        )
\ No newline at end of file